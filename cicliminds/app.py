@@ -1,10 +1,6 @@
 import os
-import json
 from datetime import datetime
 
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-from IPython.display import clear_output, display
 from ipywidgets import VBox
 
 from cicliminds.widgets.filter import FilterWidget
@@ -15,13 +11,19 @@ from cicliminds.widgets.block import BlockWidget
 from cicliminds.widgets.state_mgmt import StateMgmtWidget
 
 from cicliminds.interface.query_builder.query_builder import expand_state_into_queries
-from cicliminds.backend import process_block_query
+from cicliminds.interface.query_builder.query_builder import count_state_queries
+from cicliminds.builder import BlockBuilder
+from cicliminds.build_queue import BuildQueue
+from cicliminds.pdf_export import export_pdf
 
 
 class App:  # pylint: disable=too-few-public-methods
-    def __init__(self, datasets, model_weights):
+    def __init__(self, datasets, model_weights, builder=None):
         self.datasets = datasets
         self.model_weights = model_weights
+        self.builder = builder or BlockBuilder.from_settings(datasets, model_weights)
+        self.build_queue = BuildQueue(self.builder, self._set_block_status,
+                                      self._show_block_result, self._set_build_progress)
         self.state = {}
         self.state["filter_widget"] = self._get_filter_widget()
         self.state["filtered_widget"] = FilteredWidget()
@@ -38,11 +40,15 @@ class App:  # pylint: disable=too-few-public-methods
     def _get_staging_widget(self):
         staging_widget = StagingWidget(self.model_weights)
         staging_widget.observe(self._stage_action)
+        staging_widget.observe(self._update_queries_count_action)
         return staging_widget
 
     def _get_staged_widget(self):
-        staged_widget = StagedWidget()
+        staged_widget = StagedWidget(self.builder.workers_num)
         staged_widget.observe(self._rebuild_one_block_action)
+        staged_widget.observe(self._rebuild_blocks_action)
+        staged_widget.observe(self._cancel_builds_action)
+        staged_widget.observe(self._drop_unstaged_action)
         return staged_widget
 
     def _get_state_mgmt_widget(self):
@@ -70,11 +76,21 @@ class App:  # pylint: disable=too-few-public-methods
         filters_widget = self.state["filter_widget"]
         staging_widget = self.state["staging_widget"]
         agg_params = staging_widget.get_state()
-        filtered_dataset = filters_widget.get_filtered_dataset(agg_params)
-        filters_widget.update_state_from_dataset(filtered_dataset)
-        if filtered_dataset.shape[0] > 200:
+        filtered_mask = filters_widget.get_filtered_mask(agg_params)
+        filters_widget.update_state_from_mask(filtered_mask)
+        self.state["filtered_widget"].update_state_from_dataset(self.datasets[filtered_mask])
+        self._update_queries_count()
+
+    def _update_queries_count_action(self, objs, change):  # pylint: disable=unused-argument
+        if change is self.state["staging_widget"].state["button_stage"]:
             return
-        self.state["filtered_widget"].update_state_from_dataset(filtered_dataset)
+        self._update_queries_count()
+
+    def _update_queries_count(self):
+        staging_widget = self.state["staging_widget"]
+        agg_params = staging_widget.get_state()
+        filter_values = self.state["filter_widget"].get_filter_values()
+        staging_widget.set_queries_count(count_state_queries(self.datasets, filter_values, agg_params))
 
     @staticmethod
     def _is_filter_value_change_action(objs, change):  # pylint: disable=unused-argument
@@ -92,6 +108,8 @@ class App:  # pylint: disable=too-few-public-methods
 
     def _stage_action(self, objs, change):  # pylint: disable=unused-argument
         staging_widget = self.state["staging_widget"]
+        if change is not staging_widget.state["button_stage"]:
+            return
         agg_params = staging_widget.get_state()
         filter_values = self.state["filter_widget"].get_filter_values()
         queries_to_add = list(expand_state_into_queries(self.datasets, filter_values, agg_params))
@@ -101,27 +119,63 @@ class App:  # pylint: disable=too-few-public-methods
         block_widget = self._is_rebuild_one_action(objs, change)
         if block_widget is None:
             return
-        query = block_widget.get_query()
-        fig, ax = plt.subplots()
-        process_block_query(fig, ax, query, self.datasets, self.model_weights)
-        block_widget.replace_real_output(fig)
-        with block_widget.capture_output():
-            clear_output()
-            display(fig)
+        self._submit_builds([block_widget])
+
+    def _rebuild_blocks_action(self, objs, change):  # pylint: disable=unused-argument
+        staged_widget = self.state["staged_widget"]
+        if change is staged_widget.state["button_rebuild_all"]:
+            block_widgets = staged_widget.get_block_widgets()
+        elif change is staged_widget.state["button_build_new"]:
+            block_widgets = [block_widget for block_widget in staged_widget.get_block_widgets(only_new=True)
+                             if not self.build_queue.is_queued(block_widget)]
+        else:
+            return
+        self._submit_builds(block_widgets)
+
+    def _submit_builds(self, block_widgets):
+        blocks_with_queries = [(block_widget, block_widget.get_query()) for block_widget in block_widgets]
+        self.builder.workers_num = self.state["staged_widget"].get_workers_num()
+        self.build_queue.submit(blocks_with_queries)
+
+    def _cancel_builds_action(self, objs, change):  # pylint: disable=unused-argument
+        staged_widget = self.state["staged_widget"]
+        if change is staged_widget.state["button_cancel"] or change is staged_widget.state["button_unstage_all"]:
+            self.build_queue.cancel()
+
+    def _drop_unstaged_action(self, objs, change):
+        block_widget = self._find_block_widget(objs)
+        if block_widget is None or block_widget.state.get("unstage_button") is not change:
+            return
+        self.build_queue.discard(block_widget)
 
     @staticmethod
-    def _is_rebuild_one_action(objs, change):
-        block_widget = None
-        for obj in objs:
-            if isinstance(obj, BlockWidget):
-                block_widget = obj
-                break
-        else:
+    def _set_block_status(block_widget, status, elapsed=None, error=None):
+        block_widget.set_status(status, elapsed, error)
+
+    def _show_block_result(self, block_widget, query, payload, info):
+        block_widget.set_result(query, payload)
+        block_widget.set_stages(info.get("stages"))
+        self.state["staged_widget"].set_cache_status(self.builder.get_stats_summary())
+
+    def _set_build_progress(self, done, failed, total):
+        self.state["staged_widget"].set_progress(done, failed, total)
+
+    @classmethod
+    def _is_rebuild_one_action(cls, objs, change):
+        block_widget = cls._find_block_widget(objs)
+        if block_widget is None:
             return None
-        if block_widget.state["rebuild_button"] is change:
+        if block_widget.state.get("rebuild_button") is change:
             return block_widget
         return None
 
+    @staticmethod
+    def _find_block_widget(objs):
+        for obj in objs:
+            if isinstance(obj, BlockWidget):
+                return obj
+        return None
+
     def _dump_state_action(self, objs, change):  # pylint: disable=unused-argument
         state_mgmt_widget = self.state["state_mgmt_widget"]
         if change is not state_mgmt_widget.state["dump_state_button"]:
@@ -136,16 +190,12 @@ class App:  # pylint: disable=too-few-public-methods
         output_dir = "/tmp/cicliminds-pdfs"
         os.makedirs(output_dir, exist_ok=True)
         ts = datetime.now().strftime("%Y%m%dT%H%M")
-        current_state = self.state["staged_widget"].get_state()
         output_filename = os.path.join(output_dir, f"{ts}-cicliminds-output.pdf")
-        with PdfPages(output_filename) as pdf:
-            pdf.infodict()["query"] = json.dumps(current_state, indent=True)
-            for block in self.state["staged_widget"]._block_widgets:
-                fig = block.get_real_output()
-                if fig is None:
-                    continue
-                fig.tight_layout()
-                pdf.savefig(fig)
+        block_widgets = self.state["staged_widget"].get_block_widgets()
+        queries = [block_widget.get_query() for block_widget in block_widgets]
+        payloads = [block_widget.get_payload(query) for block_widget, query in zip(block_widgets, queries)]
+        self.builder.workers_num = self.state["staged_widget"].get_workers_num()
+        export_pdf(output_filename, queries, self.builder, payloads)
         state_mgmt_widget.set_state(f"Saved to: {output_filename}")
 
     def _stage_state_action(self, objs, change):  # pylint: disable=unused-argument
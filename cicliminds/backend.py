@@ -1,48 +1,90 @@
-import matplotlib.pyplot as plt
-import cftime
-
-from cicliminds_lib.unify.api import get_merged_inputs_by_query
-from cicliminds_lib.mask.api import get_dataset_mask_by_query
-from cicliminds_lib.plotting._helpers import _get_variable_name
+from functools import partial
 
 from cicliminds.interface.plot_types import get_plot_recipe_by_query
 from cicliminds.interface.plot_query_adapter import PlotQueryAdapter
+from cicliminds.figure_payload import dump_figure
+from cicliminds.profiling import stage
+from cicliminds.crop import crop_to_mask
+from cicliminds.time_plan import TIME_DIM
+from cicliminds.time_plan import get_init_year
+from cicliminds.time_plan import get_time_ranges
+from cicliminds.time_plan import select_time_ranges
+
+
+def render_block_inputs(plot_query, inputs, mask=None):
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+    fig, ax = plt.subplots()
+    process_block_inputs(fig, ax, plot_query, inputs, mask)
+    with stage("serialize"):
+        return dump_figure(fig)
+
+
+def render_masked_inputs(plot_query, masked_inputs):
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+    fig, ax = plt.subplots()
+    plot_datasets(fig, ax, plot_query, masked_inputs)
+    with stage("serialize"):
+        return dump_figure(fig)
 
 
 def process_block_query(fig, ax, query, datasets_reg, model_weights_reg):
     input_query, plot_query = query["input_query"], query["plot_query"]
+    inputs = load_block_inputs(input_query, datasets_reg, model_weights_reg)
+    process_block_inputs(fig, ax, plot_query, inputs)
+
+
+def load_block_inputs(input_query, datasets_reg, model_weights_reg):
+    from cicliminds_lib.unify.api import get_merged_inputs_by_query  # pylint: disable=import-outside-toplevel
     input_regs = {
         "datasets": datasets_reg,
         "model_weights": model_weights_reg
     }
-    inputs = get_merged_inputs_by_query(input_regs, input_query)
-    mask = get_dataset_mask_by_query(inputs["datasets"], plot_query)
-    inputs["datasets"] = inputs["datasets"].where(mask)
-    plot_datasets(fig, ax, plot_query, inputs)
+    with stage("load_inputs"):
+        return get_merged_inputs_by_query(input_regs, input_query)
+
+
+def process_block_inputs(fig, ax, plot_query, inputs, mask=None):
+    masked_inputs = dict(inputs)
+    with stage("select_time"):
+        # init_year refers to the whole time axis, so it is taken before unused time steps are dropped
+        init_year = get_init_year(inputs["datasets"])
+        dataset = select_time_ranges(inputs["datasets"],
+                                     get_time_ranges(plot_query, inputs["datasets"].sizes[TIME_DIM]))
+    if mask is None:
+        from cicliminds_lib.mask.api import get_dataset_mask_by_query  # pylint: disable=import-outside-toplevel
+        with stage("mask"):
+            mask = get_dataset_mask_by_query(dataset, plot_query)
+    with stage("crop"):
+        dataset, mask = crop_to_mask(dataset, mask)
+    with stage("where"):
+        masked_inputs["datasets"] = dataset.where(mask)
+    plot_datasets(fig, ax, plot_query, masked_inputs, init_year)
 
 
-def plot_datasets(fig, ax, plot_query, inputs):
+def plot_datasets(fig, ax, plot_query, inputs, init_year=None):
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
     plot_recipe = get_plot_recipe_by_query(plot_query)
-    recipe_config = get_recipe_config(plot_query, inputs["datasets"])
-    plot_recipe.plot(ax, recipe_config, inputs)
+    with stage("plot"):
+        recipe_config = get_recipe_config(plot_query, inputs["datasets"], init_year)
+        plot_recipe.plot(ax, recipe_config, inputs)
     ax.set_position((0, 0.25, 1, 0.85))
-    add_plot_descriptions(fig, ax, plot_query, inputs)
-    plt.close()
+    with stage("descriptions"):
+        add_plot_descriptions(fig, ax, plot_query, inputs)
+    plt.close(fig)
 
 
-def get_recipe_config(plot_query, masked_dataset):
+def get_recipe_config(plot_query, masked_dataset, init_year=None):
     parsed_query = PlotQueryAdapter.from_json(plot_query)
-    annotate_plot_query(parsed_query, masked_dataset)
+    annotate_plot_query(parsed_query, masked_dataset, init_year)
     return parsed_query
 
 
-def annotate_plot_query(plot_query, masked_dataset):
-    plot_query["init_year"] = cftime.num2date(masked_dataset.time.data[0],
-                                              masked_dataset.time.attrs["units"],
-                                              masked_dataset.time.attrs["calendar"]).year
+def annotate_plot_query(plot_query, masked_dataset, init_year=None):
+    plot_query["init_year"] = get_init_year(masked_dataset) if init_year is None else init_year
 
 
 def add_plot_descriptions(fig, ax, plot_query, inputs):
+    from cicliminds_lib.plotting._helpers import _get_variable_name  # pylint: disable=import-outside-toplevel
     dataset = inputs["datasets"]
     variable = _get_variable_name(dataset)
     variable_data = dataset[variable]
@@ -53,4 +95,8 @@ def add_plot_descriptions(fig, ax, plot_query, inputs):
     ax.set_title(title)
     txt = fig.text(0, 0, f"Index description: {description}\nRegions: {', '.join(plot_query['regions'])}", wrap=True)
     fig_width, _ = fig.get_size_inches()*fig.dpi
-    txt._get_wrap_line_width = lambda: fig_width*0.9
+    txt._get_wrap_line_width = partial(_get_fixed_wrap_line_width, fig_width*0.9)
+
+
+def _get_fixed_wrap_line_width(width):
+    return width
@@ -0,0 +1,126 @@
+import time
+import asyncio
+from collections import OrderedDict
+
+from cicliminds.cache.inputs_cache import InputsCache
+from cicliminds.builder import get_fusion_key
+
+
+class BuildQueue:
+    STATUS_REFRESH_SECONDS = 1
+
+    def __init__(self, builder, on_status, on_result, on_progress):
+        self.builder = builder
+        self.on_status = on_status
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.progress = {"total": 0, "done": 0, "failed": 0}
+        self._pending = OrderedDict()
+        self._running = {}
+        self._runner = None
+
+    def submit(self, blocks_with_queries):
+        if self._runner is None:
+            self.progress = {"total": 0, "done": 0, "failed": 0}
+        for block, query in sort_by_input_query(blocks_with_queries):
+            if block not in self._pending:
+                self.progress["total"] += 1
+            self._pending[block] = query
+            self.on_status(block, "queued")
+        self._report_progress()
+        if self._runner is None:
+            self._runner = asyncio.ensure_future(self._run())
+
+    def discard(self, block):
+        if self._pending.pop(block, None) is None:
+            return
+        self.progress["total"] -= 1
+        self._report_progress()
+
+    def cancel(self):
+        self.progress["total"] -= len(self._pending)
+        for block in self._pending:
+            self.on_status(block, "cancelled")
+        self._pending.clear()
+        for task in self._running.values():
+            task.cancel()
+        self._report_progress()
+
+    def is_queued(self, block):
+        return block in self._pending or block in self._running
+
+    async def _run(self):
+        try:
+            in_flight = set()
+            while self._pending or in_flight:
+                while self._pending and len(in_flight) < max(1, self.builder.workers_num):
+                    job = self._pop_job()
+                    task = asyncio.ensure_future(self._build_job(job))
+                    for block, _ in job:
+                        self._running[block] = task
+                    in_flight.add(task)
+                _, in_flight = await asyncio.wait(in_flight, timeout=self.STATUS_REFRESH_SECONDS,
+                                                  return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            self._runner = None
+
+    def _pop_job(self):
+        block, query = self._pending.popitem(last=False)
+        job = [(block, query)]
+        fusion_key = get_fusion_key(query)
+        if fusion_key is None:
+            return job
+        for other_block, other_query in list(self._pending.items()):
+            if get_fusion_key(other_query) == fusion_key:
+                job.append((other_block, other_query))
+                del self._pending[other_block]
+        return job
+
+    async def _build_job(self, job):
+        started = time.monotonic()
+        for block, _ in job:
+            self.on_status(block, "running")
+        future = asyncio.wrap_future(self.builder.submit_many([query for _, query in job]))
+        try:
+            while True:
+                done, _ = await asyncio.wait([future], timeout=self.STATUS_REFRESH_SECONDS)
+                if done:
+                    break
+                for block, _ in job:
+                    self.on_status(block, "running", time.monotonic() - started)
+            results = future.result()
+        except asyncio.CancelledError:
+            future.cancel()
+            self.progress["total"] -= len(job)
+            for block, _ in job:
+                self.on_status(block, "cancelled", time.monotonic() - started)
+            return
+        except Exception as e:  # pylint: disable=broad-except
+            self.progress["failed"] += len(job)
+            for block, _ in job:
+                self.on_status(block, "failed", time.monotonic() - started, e)
+            return
+        finally:
+            for block, _ in job:
+                self._running.pop(block, None)
+            self._report_progress()
+        for (block, query), (payload, info) in zip(job, results):
+            if payload is None:
+                self.progress["failed"] += 1
+                self.on_status(block, "failed", info["elapsed"], info["error"])
+                continue
+            self.progress["done"] += 1
+            self.on_result(block, query, payload, info)
+            self.on_status(block, "done", info["elapsed"])
+        self._report_progress()
+
+    def _report_progress(self):
+        self.on_progress(self.progress["done"], self.progress["failed"], self.progress["total"])
+
+
+def sort_by_input_query(blocks_with_queries):
+    groups = OrderedDict()
+    for block, query in blocks_with_queries:
+        groups.setdefault(InputsCache.get_key(query["input_query"]), []).append((block, query))
+    for group in groups.values():
+        yield from group
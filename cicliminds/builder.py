@@ -0,0 +1,393 @@
+import math
+import time
+import warnings
+import threading
+import multiprocessing
+from collections import OrderedDict
+from functools import partial
+from contextlib import nullcontext
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+
+from cicliminds import settings
+from cicliminds import workers
+from cicliminds.backend import load_block_inputs
+from cicliminds.backend import render_block_inputs
+from cicliminds.backend import render_masked_inputs
+from cicliminds.cache.hashing import get_json_hash
+from cicliminds.cache.inputs_cache import InputsCache
+from cicliminds.cache.inputs_store import InputsStore
+from cicliminds.cache.fldmean_store import FldmeanStore
+from cicliminds.cache.mask_cache import MaskCache
+from cicliminds.cache.result_cache import ResultCache
+from cicliminds.chunked import ChunkedExecution
+from cicliminds.interface.plot_types import is_fldmean_plot_query
+from cicliminds.profiling import stage
+from cicliminds.profiling import record_stages
+from cicliminds.profiling import merge_stages
+from cicliminds.profiling import dump_profile
+from cicliminds.regional import get_regional_fldmeans
+from cicliminds.regional import select_fused_region
+from cicliminds.regional import get_region_label
+from cicliminds.regional import get_variable_dims
+from cicliminds.regional import get_reference_region_names
+
+
+class BlockBuilder:
+    def __init__(self, datasets_reg, model_weights_reg, result_cache=None, inputs_cache=None, mask_cache=None,
+                 workers_num=1, profile="", chunked=None, inputs_store=None, fldmean_store=None):
+        self.datasets_reg = datasets_reg
+        self.model_weights_reg = model_weights_reg
+        self.result_cache = result_cache
+        self.inputs_cache = inputs_cache or InputsCache.from_settings()
+        self.mask_cache = mask_cache or MaskCache.from_settings()
+        self.workers_num = workers_num
+        self.profile = profile
+        self.chunked = chunked
+        self.inputs_store = inputs_store
+        self.fldmean_store = fldmean_store
+        self._pool = None
+        self._pool_workers_num = None
+        self._thread = None
+        self._executors_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, datasets_reg, model_weights_reg):
+        result_cache = ResultCache.from_settings(datasets_reg, model_weights_reg)
+        return cls(datasets_reg, model_weights_reg, result_cache=result_cache, workers_num=settings.BUILD_WORKERS,
+                   profile=settings.PROFILE, chunked=ChunkedExecution.from_settings(),
+                   inputs_store=InputsStore.from_settings(), fldmean_store=FldmeanStore.from_settings())
+
+    def build(self, query):
+        payload, _ = self._build(query)
+        return payload
+
+    def submit_many(self, queries):
+        results = [None]*len(queries)
+        pending = []
+        for idx, query in enumerate(queries):
+            payload = self._get_cached(query)
+            if payload is None:
+                pending.append((idx, query))
+                continue
+            results[idx] = (payload, {"cached": True, "elapsed": 0.})
+        future = Future()
+        if not pending:
+            future.set_result(results)
+            return future
+        if self.workers_num > 1:
+            pool = self._get_pool()
+            chunk_size = math.ceil(len(pending) / self.workers_num)
+            render_futures = {pool.submit(workers.render_queries, chunk): chunk
+                              for chunk in split_groups_into_chunks(group_queries_by_input(pending).values(),
+                                                                    chunk_size)}
+        else:
+            # renders of the notebook kernel all go through one thread, since pyplot and netCDF are not thread-safe
+            render_futures = {self._get_thread().submit(workers.render_queries_with, self, pending): pending}
+        completion = {"remaining": len(render_futures), "lock": threading.Lock(), "started": time.perf_counter()}
+        for render_future in render_futures:
+            render_future.add_done_callback(partial(self._complete_many, queries, results, future, render_futures,
+                                                    completion))
+        future.add_done_callback(partial(_cancel_if_cancelled, list(render_futures)))
+        return future
+
+    def build_many(self, queries):
+        queries = list(queries)
+        pending = []
+        for idx, query in enumerate(queries):
+            payload = self._get_cached(query)
+            if payload is None:
+                pending.append((idx, query))
+                continue
+            yield idx, payload, {"cached": True, "elapsed": 0.}
+        if self.workers_num > 1 and len(pending) > 1:
+            yield from self._render_in_pool(pending)
+            return
+        for idx, payload, info in self.render_many(pending):
+            self._put_cached(queries[idx], payload)
+            yield idx, payload, info
+
+    def precompute_fldmeans(self, query):
+        key = self.fldmean_store.get_key(query["input_query"], self.datasets_reg, self.model_weights_reg)
+        if self.fldmean_store.contains(key):
+            return False
+        with self._compute():
+            fldmeans = self._compute_fldmeans(query["input_query"], query["plot_query"],
+                                              [[region] for region in get_reference_region_names()])
+        if fldmeans is None:
+            return False
+        self.fldmean_store.put(key, fldmeans)
+        return True
+
+    def dump_profile(self, query, output_file):
+        return dump_profile(partial(self.render, query), output_file)
+
+    def close(self):
+        with self._executors_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+            if self._thread is not None:
+                self._thread.shutdown(cancel_futures=True)
+            self._pool = None
+            self._pool_workers_num = None
+            self._thread = None
+        if self.chunked is not None:
+            self.chunked.close()
+
+    def get_stats_summary(self):
+        summaries = [cache.get_stats_summary() for cache in [self.result_cache, self.inputs_store, self.fldmean_store]
+                     if cache is not None]
+        return "; ".join(summaries)
+
+    def _get_cached(self, query):
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get(query)
+
+    def _put_cached(self, query, payload):
+        if self.result_cache is not None and payload is not None:
+            self.result_cache.put(query, payload)
+
+    def _complete_many(self, queries, results, future, render_futures, completion, render_future):
+        if render_future.cancelled():
+            future.cancel()
+            return
+        try:
+            rendered = render_future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            info = get_failed_info(e, completion["started"])
+            rendered = [(idx, None, info) for idx, _ in render_futures[render_future]]
+        for idx, payload, info in rendered:
+            self._put_cached(queries[idx], payload)
+            results[idx] = (payload, info)
+        with completion["lock"]:
+            completion["remaining"] -= 1
+            if completion["remaining"]:
+                return
+        if future.set_running_or_notify_cancel():
+            future.set_result(results)
+
+    def _build(self, query):
+        payload = self._get_cached(query)
+        if payload is not None:
+            return payload, {"cached": True, "elapsed": 0.}
+        payload, info = self.render(query)
+        self._put_cached(query, payload)
+        return payload, info
+
+    def render(self, query):
+        if self._has_stored_fldmeans([(0, query)]):
+            _, payload, info = next(self._render_fused([(0, query)]))
+            return payload, info
+        return self._render_single(query)
+
+    def _render_single(self, query):
+        started = time.perf_counter()
+        with record_stages(self.profile) as recorder, self._compute():
+            inputs = self.inputs_cache.get_or_load(query["input_query"], self._load_inputs)
+            with stage("mask"):
+                mask = self.mask_cache.get_mask(inputs["datasets"], query["plot_query"])
+            payload = render_block_inputs(query["plot_query"], inputs, mask)
+        info = {"cached": False, "elapsed": time.perf_counter() - started}
+        if recorder is not None:
+            info["stages"] = recorder.get_summary()
+        return payload, info
+
+    def render_many(self, indexed_queries):
+        for group in group_queries_by_input(indexed_queries).values():
+            for fused_group in group_fused_queries(group):
+                yield from self._render_group(fused_group)
+
+    def _render_group(self, fused_group):
+        started = time.perf_counter()
+        rendered = set()
+        try:
+            for idx, payload, info in self._render_group_unsafe(fused_group):
+                rendered.add(idx)
+                yield idx, payload, info
+        except Exception as e:  # pylint: disable=broad-except
+            info = get_failed_info(e, started)
+            for idx, _ in fused_group:
+                if idx not in rendered:
+                    yield idx, None, info
+
+    def _render_group_unsafe(self, fused_group):
+        if len(fused_group) > 1:
+            yield from self._render_fused(fused_group)
+            return
+        idx, query = fused_group[0]
+        yield (idx, *self.render(query))
+
+    def _render_fused(self, fused_group):
+        started = time.perf_counter()
+        with record_stages(self.profile) as shared_recorder, self._compute():
+            fldmeans = self._get_fldmeans(fused_group)
+        if fldmeans is None:
+            for idx, query in fused_group:
+                yield (idx, *self._render_single(query))
+            return
+        shared_elapsed = (time.perf_counter() - started) / len(fused_group)
+        for idx, query in fused_group:
+            started = time.perf_counter()
+            with record_stages(self.profile) as recorder, self._compute():
+                reduced_inputs = dict(fldmeans["inputs"])
+                reduced_inputs["datasets"] = select_fused_region(fldmeans["fldmeans"],
+                                                                 get_region_label(query["plot_query"]["regions"]),
+                                                                 fldmeans["variable_dims"], fldmeans["grid_dims"])
+                payload = render_masked_inputs(query["plot_query"], reduced_inputs)
+            info = {"cached": False, "elapsed": shared_elapsed + time.perf_counter() - started, "fused": True}
+            if recorder is not None:
+                info["stages"] = merge_stages(shared_recorder.get_summary(share=len(fused_group)),
+                                              recorder.get_summary())
+            yield idx, payload, info
+
+    def _has_stored_fldmeans(self, fused_group):
+        if self.fldmean_store is None or not self._can_use_stored_fldmeans(fused_group):
+            return False
+        key = self.fldmean_store.get_key(fused_group[0][1]["input_query"], self.datasets_reg, self.model_weights_reg)
+        return self.fldmean_store.contains(key)
+
+    def _can_use_stored_fldmeans(self, fused_group):
+        region_names = get_reference_region_names()
+        return all(get_fusion_key(query) is not None and len(query["plot_query"]["regions"]) == 1
+                   and query["plot_query"]["regions"][0] in region_names for _, query in fused_group)
+
+    def _get_fldmeans(self, fused_group):
+        input_query, plot_query = fused_group[0][1]["input_query"], fused_group[0][1]["plot_query"]
+        if self.fldmean_store is not None and self._can_use_stored_fldmeans(fused_group):
+            key = self.fldmean_store.get_key(input_query, self.datasets_reg, self.model_weights_reg)
+            with stage("stored_fldmeans"):
+                fldmeans = self.fldmean_store.get(key)
+            if fldmeans is not None:
+                return fldmeans
+        # the store is filled with all reference regions by precompute_fldmeans, builds only compute their own regions
+        region_sets = {get_region_label(query["plot_query"]["regions"]): query["plot_query"]["regions"]
+                       for _, query in fused_group}
+        return self._compute_fldmeans(input_query, plot_query, list(region_sets.values()))
+
+    def _compute_fldmeans(self, input_query, plot_query, region_sets):
+        inputs = self.inputs_cache.get_or_load(input_query, self._load_inputs)
+        dataset = inputs["datasets"]
+        grid_dims = self.mask_cache.get_grid_dims(dataset)
+        if grid_dims is None:
+            return None
+        with stage("mask"):
+            masks = [self.mask_cache.get_mask(dataset, dict(plot_query, regions=regions)) for regions in region_sets]
+        with stage("fldmean"):
+            labels = [get_region_label(regions) for regions in region_sets]
+            regional_fldmeans = get_regional_fldmeans(dataset, masks, grid_dims, labels).load()
+        return {"fldmeans": regional_fldmeans,
+                "inputs": {k: v for k, v in inputs.items() if k != "datasets"},
+                "variable_dims": get_variable_dims(dataset),
+                "grid_dims": grid_dims}
+
+    def _render_in_pool(self, pending):
+        pool = self._get_pool()
+        chunk_size = math.ceil(len(pending) / self.workers_num)
+        queries = dict(pending)
+        started = time.perf_counter()
+        futures = {pool.submit(workers.render_queries, chunk): chunk
+                   for chunk in split_groups_into_chunks(group_queries_by_input(pending).values(), chunk_size)}
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                info = get_failed_info(e, started)
+                results = [(idx, None, info) for idx, _ in futures[future]]
+            for idx, payload, info in results:
+                self._put_cached(queries[idx], payload)
+                yield idx, payload, info
+
+    def _get_pool(self):
+        with self._executors_lock:
+            if self._pool is not None and self._pool_workers_num == self.workers_num:
+                return self._pool
+            if self._pool is not None:
+                # blocks already submitted to the old pool are still finished, without blocking the caller
+                self._pool.shutdown(wait=False)
+            mp_context = multiprocessing.get_context(settings.BUILD_START_METHOD)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers_num, mp_context=mp_context,
+                                             initializer=workers.init_worker,
+                                             initargs=(self.datasets_reg, self.model_weights_reg,
+                                                       workers.get_worker_rc_params(), self.profile,
+                                                       self.chunked.for_worker() if self.chunked is not None else None))
+            self._pool_workers_num = self.workers_num
+            return self._pool
+
+    def _get_thread(self):
+        # requests of the render server call the builder from several threads
+        with self._executors_lock:
+            if self._thread is None:
+                self._thread = ThreadPoolExecutor(max_workers=1)
+            return self._thread
+
+    def _compute(self):
+        if self.chunked is None:
+            return nullcontext()
+        return self.chunked.compute()
+
+    def _load_inputs(self, input_query):
+        inputs = self._load_stored_inputs(input_query)
+        if self.chunked is not None:
+            inputs = self.chunked.chunk_inputs(inputs)
+        return inputs
+
+    def _load_stored_inputs(self, input_query):
+        if self.inputs_store is None:
+            return load_block_inputs(input_query, self.datasets_reg, self.model_weights_reg)
+        key = self.inputs_store.get_key(input_query, self.datasets_reg, self.model_weights_reg)
+        with stage("stored_inputs"):
+            inputs = self.inputs_store.get(key)
+        if inputs is None:
+            inputs = load_block_inputs(input_query, self.datasets_reg, self.model_weights_reg)
+            with stage("store_inputs"):
+                try:
+                    self.inputs_store.put(key, inputs)
+                except Exception as e:  # pylint: disable=broad-except
+                    # the store only saves loading time, the loaded inputs are used either way
+                    warnings.warn(f"Could not store the inputs: {e!r}")
+        return inputs
+
+
+def group_queries_by_input(indexed_queries):
+    groups = OrderedDict()
+    for idx, query in indexed_queries:
+        key = InputsCache.get_key(query["input_query"])
+        groups.setdefault(key, []).append((idx, query))
+    return groups
+
+
+def get_fusion_key(query):
+    plot_query = query["plot_query"]
+    if not plot_query["regions"] or not is_fldmean_plot_query(plot_query):
+        return None
+    return get_json_hash({"input_query": query["input_query"],
+                          "plot_query": {k: v for k, v in plot_query.items() if k != "regions"}})
+
+
+def group_fused_queries(items_with_queries):
+    groups = OrderedDict()
+    for item, query in items_with_queries:
+        key = get_fusion_key(query)
+        if key is None:
+            key = len(groups)
+        groups.setdefault(key, []).append((item, query))
+    return list(groups.values())
+
+
+def split_groups_into_chunks(groups, chunk_size):
+    for group in groups:
+        for start in range(0, len(group), chunk_size):
+            yield group[start:start+chunk_size]
+
+
+def get_failed_info(error, started):
+    return {"cached": False, "elapsed": time.perf_counter() - started, "error": repr(error)}
+
+
+def _cancel_if_cancelled(render_futures, future):
+    if future.cancelled():
+        for render_future in render_futures:
+            render_future.cancel()
@@ -0,0 +1,45 @@
+import os
+import pickle
+
+from cicliminds import settings
+from cicliminds.cache.hashing import get_json_hash
+from cicliminds.cache.hashing import get_input_sources_fingerprint
+from cicliminds.cache.storage import DiskStore
+
+
+class FldmeanStore:
+    VERSION = 1
+
+    def __init__(self, path, max_bytes):
+        self.disk = DiskStore(path, max_bytes)
+        self.stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def from_settings(cls):
+        if not settings.CACHE_DIR or settings.FLDMEAN_STORE_BYTES <= 0:
+            return None
+        return cls(os.path.join(settings.CACHE_DIR, "fldmeans"), settings.FLDMEAN_STORE_BYTES)
+
+    def get_key(self, input_query, datasets_reg, model_weights_reg):
+        return get_json_hash({
+            "version": self.VERSION,
+            "input_query": input_query,
+            "sources": get_input_sources_fingerprint(datasets_reg, model_weights_reg, input_query)
+        })
+
+    def contains(self, key):
+        return os.path.exists(self.disk.get_filename(key))
+
+    def get(self, key):
+        value = self.disk.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return pickle.loads(value)
+
+    def put(self, key, fldmeans):
+        self.disk.put(key, pickle.dumps(fldmeans, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def get_stats_summary(self):
+        return f"stored fldmeans: {self.stats['hits']} hits, {self.stats['misses']} misses"
@@ -0,0 +1,63 @@
+import os
+import sys
+import json
+import hashlib
+
+import pandas as pd
+
+
+def get_json_hash(obj):
+    canonical = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_registry_fingerprint(*registries):
+    digest = hashlib.sha256()
+    for registry in registries:
+        digest.update(json.dumps(list(map(str, registry.columns))).encode("utf-8"))
+        row_hashes = pd.util.hash_pandas_object(registry.astype(str), index=True)
+        digest.update(row_hashes.values.tobytes())
+    return digest.hexdigest()
+
+
+def get_query_hash(query):
+    return get_json_hash({"input_query": query["input_query"], "plot_query": query["plot_query"]})
+
+
+def get_input_sources_fingerprint(datasets_reg, model_weights_reg, input_query):
+    datasets = select_registry_rows(datasets_reg, input_query["datasets"])
+    model_weights = select_registry_rows(model_weights_reg, {"name": input_query["model_weights"]})
+    digest = hashlib.sha256(get_registry_fingerprint(datasets, model_weights).encode("utf-8"))
+    for path in get_registry_files(datasets):
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def select_registry_rows(registry, field_values):
+    mask = pd.Series(True, index=registry.index)
+    for field, values in field_values.items():
+        if field in registry.columns and values:
+            mask &= registry[field].isin(values)
+    return registry[mask]
+
+
+def get_registry_files(registry):
+    for column in registry.columns:
+        values = registry[column]
+        if values.dtype != object or values.empty:
+            continue
+        first = values.iloc[0]
+        if isinstance(first, str) and os.path.isfile(first):
+            yield from values
+
+
+def get_package_versions(packages):
+    from importlib.metadata import version, PackageNotFoundError  # pylint: disable=import-outside-toplevel
+    res = {"python": sys.version.split()[0]}
+    for package in packages:
+        try:
+            res[package] = version(package)
+        except PackageNotFoundError:
+            res[package] = None
+    return res
@@ -0,0 +1,31 @@
+from cicliminds import settings
+from cicliminds.cache.hashing import get_json_hash
+from cicliminds.cache.storage import MemoryStore
+
+
+class InputsCache:
+    def __init__(self, max_items):
+        self.memory = MemoryStore(max_items)
+        self.stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.INPUTS_CACHE_ITEMS)
+
+    @staticmethod
+    def get_key(input_query):
+        return get_json_hash(input_query)
+
+    def get_or_load(self, input_query, load_func):
+        key = self.get_key(input_query)
+        inputs = self.memory.get(key)
+        if inputs is not None:
+            self.stats["hits"] += 1
+            return inputs
+        self.stats["misses"] += 1
+        inputs = load_func(input_query)
+        self.memory.put(key, inputs)
+        return inputs
+
+    def clear(self):
+        self.memory.clear()
@@ -0,0 +1,163 @@
+import os
+import fcntl
+import shutil
+import pickle
+import threading
+
+from cicliminds import settings
+from cicliminds.cache.hashing import get_json_hash
+from cicliminds.cache.hashing import get_input_sources_fingerprint
+
+
+class InputsStore:
+    VERSION = 2
+    SUFFIX = ".zarr"
+    TIME_DIM = "time"
+    TIME_CHUNK = 10
+    LOCK_SUFFIX = ".lock"
+    EXTRAS_FILENAME = "cicliminds-inputs.pkl"
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._read_locks = {}
+        os.makedirs(self.path, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls):
+        if not settings.CACHE_DIR or settings.INPUTS_STORE_BYTES <= 0:
+            return None
+        return cls(os.path.join(settings.CACHE_DIR, "inputs"), settings.INPUTS_STORE_BYTES)
+
+    def get_key(self, input_query, datasets_reg, model_weights_reg):
+        return get_json_hash({
+            "version": self.VERSION,
+            "input_query": input_query,
+            "sources": get_input_sources_fingerprint(datasets_reg, model_weights_reg, input_query)
+        })
+
+    def get(self, key):
+        import xarray as xr  # pylint: disable=import-outside-toplevel
+        dirname = self._get_dirname(key)
+        self._hold_read_lock(key)
+        try:
+            with open(os.path.join(dirname, self.EXTRAS_FILENAME), "rb") as fin:
+                inputs = pickle.load(fin)
+        except FileNotFoundError:
+            self._release_read_lock(key)
+            self.stats["misses"] += 1
+            return None
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, TypeError):
+            # written only partially or by an incompatible version, so it is replaced by the next put
+            self._release_read_lock(key)
+            self._discard(key)
+            self.stats["misses"] += 1
+            return None
+        os.utime(dirname)
+        inputs["datasets"] = xr.open_zarr(dirname, decode_times=False)
+        self.stats["hits"] += 1
+        return inputs
+
+    def put(self, key, inputs):
+        dirname = self._get_dirname(key)
+        tmp_dirname = f"{dirname}.{os.getpid()}.{threading.get_ident()}.tmp"
+        dataset = inputs["datasets"].copy()
+        for variable in dataset.variables.values():
+            variable.encoding = {}
+        # time steps are stored in small chunks, so that plots reading a part of the time axis read only that part
+        for variable in dataset.data_vars.values():
+            if self.TIME_DIM in variable.dims and variable.chunks is None:
+                variable.encoding["chunks"] = tuple(min(self.TIME_CHUNK, size) if dim == self.TIME_DIM else size
+                                                    for dim, size in zip(variable.dims, variable.shape))
+        try:
+            dataset.to_zarr(tmp_dirname, mode="w")
+            with open(os.path.join(tmp_dirname, self.EXTRAS_FILENAME), "wb") as fout:
+                pickle.dump({k: v for k, v in inputs.items() if k != "datasets"}, fout,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                try:
+                    os.rename(tmp_dirname, dirname)
+                except OSError:
+                    return
+                self._evict()
+        finally:
+            shutil.rmtree(tmp_dirname, ignore_errors=True)
+
+    def get_stats_summary(self):
+        return f"stored inputs: {self.stats['hits']} hits, {self.stats['misses']} misses"
+
+    def _evict(self):
+        entries = sorted(self._list_entries(), key=lambda entry: entry[2])
+        total_bytes = sum(size for _, size, _ in entries)
+        for dirname, size, _ in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            # entries opened by builds in this or other processes are read lazily, so they are kept
+            if self._discard(os.path.basename(dirname)[:-len(self.SUFFIX)]):
+                total_bytes -= size
+
+    def _discard(self, key):
+        fd = self._lock_entry(key, exclusive=True)
+        if fd is None:
+            return False
+        try:
+            shutil.rmtree(self._get_dirname(key), ignore_errors=True)
+            os.remove(self._get_lock_filename(key))
+        finally:
+            os.close(fd)
+        return True
+
+    def _hold_read_lock(self, key):
+        # the lock is held until the process exits, since the lazily opened inputs may be read at any later time
+        with self._lock:
+            if key not in self._read_locks:
+                self._read_locks[key] = self._lock_entry(key)
+
+    def _release_read_lock(self, key):
+        with self._lock:
+            fd = self._read_locks.pop(key, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _lock_entry(self, key, exclusive=False):
+        filename = self._get_lock_filename(key)
+        while True:
+            fd = os.open(filename, os.O_RDWR | os.O_CREAT)
+            try:
+                fcntl.flock(fd, (fcntl.LOCK_EX | fcntl.LOCK_NB) if exclusive else fcntl.LOCK_SH)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+            # the lock file may have been removed by an eviction while waiting for the lock
+            try:
+                if os.stat(filename).st_ino == os.fstat(fd).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+
+    def _list_entries(self):
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                yield entry.path, get_dir_size(entry.path), entry.stat().st_mtime
+
+    def _get_dirname(self, key):
+        return os.path.join(self.path, f"{key}{self.SUFFIX}")
+
+    def _get_lock_filename(self, key):
+        return os.path.join(self.path, f"{key}{self.LOCK_SUFFIX}")
+
+
+def get_dir_size(dirname):
+    res = 0
+    for root, _, filenames in os.walk(dirname):
+        for filename in filenames:
+            try:
+                res += os.path.getsize(os.path.join(root, filename))
+            except FileNotFoundError:
+                pass
+    return res
@@ -0,0 +1,110 @@
+import os
+import hashlib
+import threading
+from urllib.parse import quote
+
+import numpy as np
+
+from cicliminds import settings
+from cicliminds.cache.hashing import get_json_hash
+from cicliminds.cache.hashing import get_package_versions
+from cicliminds.cache.storage import MemoryStore
+
+
+class MaskCache:
+    VERSION = 1
+    GRID_DIMS = [("lat", "lon"), ("latitude", "longitude"), ("y", "x")]
+    # region outlines and rasterisation come from the lib, so masks of other lib versions are stored apart
+    MASK_PACKAGES = ["cicliminds-lib"]
+
+    def __init__(self, max_items, disk_path=None):
+        self.memory = MemoryStore(max_items)
+        self.disk_path = disk_path
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._versions_key = None
+
+    @classmethod
+    def from_settings(cls):
+        disk_path = os.path.join(settings.CACHE_DIR, "masks") if settings.CACHE_DIR else None
+        return cls(settings.MASK_CACHE_MEMORY_ITEMS, disk_path)
+
+    def get_mask(self, dataset, plot_query):
+        import xarray as xr  # pylint: disable=import-outside-toplevel
+        from cicliminds_lib.mask.api import get_dataset_mask_by_query  # pylint: disable=import-outside-toplevel
+        regions = plot_query["regions"]
+        grid_dims = self.get_grid_dims(dataset)
+        if not regions or grid_dims is None:
+            return get_dataset_mask_by_query(dataset, plot_query)
+        grid_signature = get_grid_signature(dataset, grid_dims)
+        region_masks = [self.get_region_mask(dataset, grid_signature, plot_query, region) for region in regions]
+        dims = region_masks[0].dims
+        combined_mask = np.logical_or.reduce([region_mask.values for region_mask in region_masks])
+        return xr.DataArray(combined_mask, dims=dims, coords={dim: dataset[dim] for dim in dims})
+
+    def get_region_mask(self, dataset, grid_signature, plot_query, region):
+        import xarray as xr  # pylint: disable=import-outside-toplevel
+        from cicliminds_lib.mask.api import get_dataset_mask_by_query  # pylint: disable=import-outside-toplevel
+        key = (grid_signature, region)
+        region_mask = self.memory.get(key)
+        if region_mask is not None:
+            self.stats["memory_hits"] += 1
+            return region_mask
+        region_mask = self._load(dataset, grid_signature, region)
+        if region_mask is not None:
+            self.stats["disk_hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            region_query = dict(plot_query, regions=[region])
+            mask = get_dataset_mask_by_query(dataset, region_query)
+            region_mask = xr.DataArray(np.asarray(mask.values, dtype=bool), dims=mask.dims,
+                                       coords={dim: dataset[dim] for dim in mask.dims})
+            self._store(region_mask, grid_signature, region)
+        self.memory.put(key, region_mask)
+        return region_mask
+
+    @classmethod
+    def get_grid_dims(cls, dataset):
+        for grid_dims in cls.GRID_DIMS:
+            if all(dim in dataset.coords for dim in grid_dims):
+                return grid_dims
+        return None
+
+    def _load(self, dataset, grid_signature, region):
+        import xarray as xr  # pylint: disable=import-outside-toplevel
+        if self.disk_path is None:
+            return None
+        try:
+            with np.load(self._get_filename(grid_signature, region)) as stored:
+                shape = tuple(stored["shape"])
+                dims = tuple(stored["dims"])
+                values = np.unpackbits(stored["bits"], count=int(np.prod(shape))).reshape(shape).astype(bool)
+        except FileNotFoundError:
+            return None
+        return xr.DataArray(values, dims=dims, coords={dim: dataset[dim] for dim in dims})
+
+    def _store(self, region_mask, grid_signature, region):
+        if self.disk_path is None:
+            return
+        filename = self._get_filename(grid_signature, region)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp_filename, bits=np.packbits(region_mask.values), shape=np.array(region_mask.shape),
+                 dims=np.array(region_mask.dims))
+        os.replace(tmp_filename, filename)
+
+    def _get_filename(self, grid_signature, region):
+        return os.path.join(self.disk_path, self._get_versions_key(), grid_signature, f"{quote(region, safe='')}.npz")
+
+    def _get_versions_key(self):
+        if self._versions_key is None:
+            self._versions_key = get_json_hash({"version": self.VERSION,
+                                                "versions": get_package_versions(self.MASK_PACKAGES)})
+        return self._versions_key
+
+
+def get_grid_signature(dataset, grid_dims):
+    digest = hashlib.sha256()
+    for dim in grid_dims:
+        digest.update(dim.encode("utf-8"))
+        digest.update(np.ascontiguousarray(dataset[dim].values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
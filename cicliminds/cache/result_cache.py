@@ -0,0 +1,92 @@
+import os
+import hashlib
+import threading
+
+from cicliminds import settings
+from cicliminds.cache.hashing import get_json_hash
+from cicliminds.cache.hashing import get_registry_fingerprint
+from cicliminds.cache.hashing import get_package_versions
+from cicliminds.cache.storage import MemoryStore
+from cicliminds.cache.storage import DiskStore
+
+
+class ResultCache:
+    VERSION = 3
+    # payloads are pickled figures, which can only be loaded back with the same versions of these packages
+    PAYLOAD_PACKAGES = ["matplotlib", "numpy", "cicliminds-lib"]
+    DIGEST_SIZE = hashlib.sha256().digest_size
+
+    def __init__(self, registry_fingerprint, memory_items, disk_path=None, disk_max_bytes=0):
+        self.registry_fingerprint = registry_fingerprint
+        self.memory = MemoryStore(memory_items)
+        self.disk = DiskStore(disk_path, disk_max_bytes) if disk_path else None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._versions = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, datasets_reg, model_weights_reg):
+        registry_fingerprint = get_registry_fingerprint(datasets_reg, model_weights_reg)
+        disk_path = None
+        if settings.CACHE_DIR and settings.RESULT_CACHE_DISK_BYTES > 0:
+            disk_path = os.path.join(settings.CACHE_DIR, "results")
+        return cls(registry_fingerprint, settings.RESULT_CACHE_MEMORY_ITEMS,
+                   disk_path, settings.RESULT_CACHE_DISK_BYTES)
+
+    def get_key(self, query):
+        return get_json_hash({
+            "version": self.VERSION,
+            "registry": self.registry_fingerprint,
+            "versions": self._get_versions(),
+            "input_query": query["input_query"],
+            "plot_query": query["plot_query"]
+        })
+
+    def get(self, query):
+        key = self.get_key(query)
+        payload = self.memory.get(key)
+        if payload is not None:
+            self._count("memory_hits")
+            return payload
+        if self.disk is not None:
+            stored = self.disk.get(key)
+            payload = get_verified_payload(stored, self.DIGEST_SIZE) if stored is not None else None
+            if payload is not None:
+                self._count("disk_hits")
+                self.memory.put(key, payload)
+                return payload
+            if stored is not None:
+                self.disk.discard(key)
+        self._count("misses")
+        return None
+
+    def put(self, query, payload):
+        key = self.get_key(query)
+        self.memory.put(key, payload)
+        if self.disk is not None:
+            self.disk.put(key, hashlib.sha256(payload).digest() + payload)
+
+    def _count(self, event):
+        # hits are counted from the threads that complete builds, and read by the render server
+        with self._lock:
+            self.stats[event] += 1
+
+    def _get_versions(self):
+        if self._versions is None:
+            self._versions = get_package_versions(self.PAYLOAD_PACKAGES)
+        return self._versions
+
+    def get_stats_summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        return (f"cache: {hits} hits ({stats['memory_hits']} memory, {stats['disk_hits']} disk), "
+                f"{stats['misses']} misses")
+
+
+def get_verified_payload(stored, digest_size):
+    # stored payloads that other versions may fail to load have other keys, so only damaged files are left to detect
+    digest, payload = stored[:digest_size], stored[digest_size:]
+    if hashlib.sha256(payload).digest() != digest:
+        return None
+    return payload
@@ -0,0 +1,105 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class MemoryStore:
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._items.move_to_end(key)
+            except KeyError:
+                return None
+            return self._items[key]
+
+    def put(self, key, value):
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DiskStore:
+    SUFFIX = ".bin"
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._list_entries())
+
+    def get(self, key):
+        filename = self.get_filename(key)
+        try:
+            with open(filename, "rb") as fin:
+                value = fin.read()
+        except FileNotFoundError:
+            return None
+        os.utime(filename)
+        return value
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        filename = self.get_filename(key)
+        tmp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_filename, "wb") as fout:
+            fout.write(value)
+        with self._lock:
+            try:
+                self._total_bytes -= os.path.getsize(filename)
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_filename, filename)
+            self._total_bytes += len(value)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def discard(self, key):
+        filename = self.get_filename(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(filename)
+                os.remove(filename)
+            except FileNotFoundError:
+                return
+            self._total_bytes -= size
+
+    def _evict(self):
+        entries = sorted(self._list_entries(), key=lambda entry: entry[2])
+        self._total_bytes = sum(size for _, size, _ in entries)
+        for filename, size, _ in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+            self._total_bytes -= size
+
+    def _list_entries(self):
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                stat = entry.stat()
+                yield entry.path, stat.st_size, stat.st_mtime
+
+    def get_filename(self, key):
+        return os.path.join(self.path, f"{key}{self.SUFFIX}")
@@ -0,0 +1,207 @@
+import os
+import pickle
+import hashlib
+
+import pandas as pd
+
+from cicliminds_lib.query.files import get_datasets as scan_datasets
+
+from cicliminds import settings
+from cicliminds.cache.mask_cache import MaskCache
+from cicliminds.cache.mask_cache import get_grid_signature
+
+
+class DatasetsCatalogue:
+    VERSION = 1
+
+    def __init__(self, data_dir, path, with_metadata=False):
+        self.data_dir = os.path.abspath(data_dir)
+        self.path = path
+        self.with_metadata = with_metadata
+        self.datasets = None
+        self.metadata = {}
+        self.stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+
+    @classmethod
+    def from_settings(cls, data_dir):
+        path = settings.CATALOGUE_PATH
+        if not path:
+            data_dir_hash = hashlib.sha256(os.path.abspath(data_dir).encode("utf-8")).hexdigest()
+            path = os.path.join(settings.CACHE_DIR, "catalogues", f"{data_dir_hash[:16]}.pkl")
+        return cls(data_dir, path, settings.CATALOGUE_METADATA)
+
+    def refresh(self):
+        stored = self._load()
+        files = scan_files(self.data_dir)
+        stored_files = stored["files"] if stored is not None else {}
+        changed = [relpath for relpath, fingerprint in files.items() if stored_files.get(relpath) != fingerprint]
+        removed = [relpath for relpath in stored_files if relpath not in files]
+        self.stats = {"added": sum(relpath not in stored_files for relpath in changed),
+                      "changed": sum(relpath in stored_files for relpath in changed),
+                      "removed": len(removed),
+                      "unchanged": len(files) - len(changed)}
+        if stored is not None and not changed and not removed:
+            self.datasets = stored["datasets"]
+            self.metadata = stored["metadata"]
+            return self.datasets
+
+        datasets = None
+        if stored is not None and stored["path_column"] is not None:
+            datasets = self._update_datasets(stored["datasets"], stored["path_column"], changed, removed)
+        if datasets is None:
+            datasets = scan_datasets(self.data_dir)
+            metadata = {}
+            changed = list(files)
+        else:
+            metadata = {relpath: meta for relpath, meta in stored["metadata"].items()
+                        if relpath in files and relpath not in changed}
+        if self.with_metadata:
+            for relpath in changed:
+                metadata[relpath] = get_file_metadata(os.path.join(self.data_dir, relpath))
+        self.datasets = datasets
+        self.metadata = metadata
+        self._store({"version": self.VERSION,
+                     "data_dir": self.data_dir,
+                     "with_metadata": self.with_metadata,
+                     "files": files,
+                     "path_column": get_path_column(datasets, self.data_dir, files),
+                     "datasets": datasets,
+                     "metadata": metadata})
+        return datasets
+
+    def get_metadata(self):
+        return pd.DataFrame.from_dict(self.metadata, orient="index")
+
+    def get_stats_summary(self):
+        return ", ".join(f"{key}: {val}" for key, val in self.stats.items())
+
+    def _update_datasets(self, datasets, path_column, changed, removed):
+        relpaths = datasets[path_column].map(lambda path: get_relpath(path, self.data_dir))
+        kept = datasets[~relpaths.isin(set(changed) | set(removed))]
+        if not changed:
+            return kept
+        parsed = parse_files(self.data_dir, changed, datasets, path_column)
+        if parsed is None:
+            return None
+        updated = pd.concat([kept, parsed])
+        updated = updated.sort_values(path_column, kind="stable")
+        if isinstance(datasets.index, pd.RangeIndex):
+            updated = updated.reset_index(drop=True)
+        return updated
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as fin:
+                stored = pickle.load(fin)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored.get("version") != self.VERSION or stored.get("data_dir") != self.data_dir:
+            return None
+        if self.with_metadata and not stored["with_metadata"]:
+            return None
+        return stored
+
+    def _store(self, stored):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_filename = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_filename, "wb") as fout:
+            pickle.dump(stored, fout, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filename, self.path)
+
+
+def get_datasets(data_dir):
+    return DatasetsCatalogue.from_settings(data_dir).refresh()
+
+
+def scan_files(data_dir):
+    res = {}
+    for root, dirs, filenames in os.walk(data_dir):
+        dirs[:] = [dirname for dirname in dirs if not dirname.startswith(".")]
+        for filename in filenames:
+            if filename.startswith("."):
+                continue
+            stat = os.stat(os.path.join(root, filename))
+            relpath = os.path.relpath(os.path.join(root, filename), data_dir)
+            res[relpath] = (stat.st_size, stat.st_mtime_ns)
+    return res
+
+
+def parse_files(data_dir, relpaths, datasets, path_column):
+    filename_fields = get_filename_fields(datasets, path_column)
+    if filename_fields is None:
+        return None
+    extensions = set(datasets[path_column].map(lambda path: os.path.splitext(path)[1]))
+    fields_num = len(split_filename(datasets[path_column].iloc[0]))
+    absolute = os.path.isabs(datasets[path_column].iloc[0])
+    rows = []
+    for relpath in relpaths:
+        parts = split_filename(relpath)
+        # files the stored registry can not explain are left to a full scan by cicliminds-lib
+        if os.path.splitext(relpath)[1] not in extensions or len(parts) != fields_num:
+            return None
+        row = {column: parts[pos] for column, pos in filename_fields.items()}
+        row[path_column] = os.path.join(data_dir, relpath) if absolute else relpath
+        rows.append(row)
+    return pd.DataFrame(rows, columns=datasets.columns)
+
+
+def get_filename_fields(datasets, path_column):
+    # positions of the registry fields in the file names, learned from the rows parsed by cicliminds-lib
+    parts = datasets[path_column].map(split_filename)
+    if parts.empty or parts.map(len).nunique() != 1:
+        return None
+    res = {}
+    for column in datasets.columns:
+        if column == path_column:
+            continue
+        positions = [pos for pos in range(len(parts.iloc[0]))
+                     if parts.map(lambda val, pos=pos: val[pos]).equals(datasets[column])]
+        if not positions:
+            return None
+        res[column] = positions[0]
+    return res
+
+
+def split_filename(path):
+    return os.path.splitext(os.path.basename(path))[0].split("_")
+
+
+def get_path_column(datasets, data_dir, files):
+    for column in datasets.columns:
+        if datasets[column].dtype != object or datasets.shape[0] == 0:
+            continue
+        values = datasets[column]
+        if not values.map(lambda val: isinstance(val, str)).all():
+            continue
+        if values.map(lambda path: get_relpath(path, data_dir)).isin(set(files)).all():
+            return column
+    return None
+
+
+def get_relpath(path, data_dir):
+    if os.path.isabs(path):
+        return os.path.relpath(path, data_dir)
+    return path
+
+
+def get_file_metadata(filename):
+    import cftime  # pylint: disable=import-outside-toplevel
+    import xarray as xr  # pylint: disable=import-outside-toplevel
+    try:
+        with xr.open_dataset(filename, decode_times=False) as dataset:
+            grid_dims = MaskCache.get_grid_dims(dataset)
+            res = {"grid_signature": get_grid_signature(dataset, grid_dims) if grid_dims is not None else None,
+                   "time_steps": 0, "time_start": None, "time_end": None, "calendar": None, "time_units": None}
+            if "time" not in dataset.coords or dataset["time"].size == 0:
+                return res
+            time = dataset["time"]
+            calendar = time.attrs.get("calendar", "standard")
+            time_start, time_end = cftime.num2date([time.values[0], time.values[-1]], time.attrs["units"], calendar)
+            res.update({"time_steps": int(time.size),
+                        "time_start": time_start.isoformat(),
+                        "time_end": time_end.isoformat(),
+                        "calendar": calendar,
+                        "time_units": time.attrs["units"]})
+            return res
+    except (OSError, ValueError, KeyError):
+        return {}
@@ -0,0 +1,70 @@
+from contextlib import contextmanager
+
+from cicliminds import settings
+
+DASK_SCHEDULERS = ["threads", "processes", "synchronous", "distributed"]
+
+
+class ChunkedExecution:
+    def __init__(self, chunks, scheduler="threads", workers_num=None, memory_limit="auto"):
+        if scheduler not in DASK_SCHEDULERS:
+            raise ValueError(f"Unknown dask scheduler: {scheduler}. Expected one of {DASK_SCHEDULERS}")
+        if memory_limit != "auto" and scheduler != "distributed":
+            raise ValueError(f"Dask memory limit {memory_limit} is only applied by the distributed scheduler, "
+                             f"not by {scheduler}")
+        self.chunks = chunks
+        self.scheduler = scheduler
+        self.workers_num = workers_num
+        self.memory_limit = memory_limit
+        self._client = None
+
+    @classmethod
+    def from_settings(cls):
+        if not settings.DASK_CHUNKS:
+            return None
+        return cls(parse_chunks(settings.DASK_CHUNKS), settings.DASK_SCHEDULER,
+                   settings.DASK_WORKERS or None, settings.DASK_MEMORY_LIMIT)
+
+    def chunk_inputs(self, inputs):
+        chunked_inputs = dict(inputs)
+        chunked_inputs["datasets"] = inputs["datasets"].chunk(self.chunks)
+        return chunked_inputs
+
+    @contextmanager
+    def compute(self):
+        import dask  # pylint: disable=import-outside-toplevel
+        if self.scheduler == "distributed":
+            with dask.config.set(scheduler=self._get_client()):
+                yield
+            return
+        with dask.config.set(scheduler=self.scheduler, num_workers=self.workers_num):
+            yield
+
+    def for_worker(self):
+        return ChunkedExecution(self.chunks, "synchronous")
+
+    def close(self):
+        if self._client is None:
+            return
+        cluster = self._client.cluster
+        self._client.close()
+        cluster.close()
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from dask.distributed import Client, LocalCluster  # pylint: disable=import-outside-toplevel
+            cluster = LocalCluster(n_workers=self.workers_num, memory_limit=self.memory_limit, processes=True)
+            self._client = Client(cluster, set_as_default=False)
+        return self._client
+
+
+def parse_chunks(chunks):
+    if chunks == "auto":
+        return chunks
+    res = {}
+    for dim_chunk in chunks.split(","):
+        dim, chunk = dim_chunk.split("=")
+        chunk = chunk.strip()
+        res[dim.strip()] = chunk if chunk == "auto" else int(chunk)
+    return res
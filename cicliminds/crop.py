@@ -0,0 +1,58 @@
+import numpy as np
+
+CIRCULAR_DIMS = ["lon", "longitude"]
+
+
+def crop_to_mask(dataset, mask):
+    if not hasattr(mask, "dims") or not all(dim in dataset.dims for dim in mask.dims):
+        return dataset, mask
+    values = np.asarray(mask.values, dtype=bool)
+    if not values.any():
+        return dataset, mask
+    indexers = {}
+    for axis, dim in enumerate(mask.dims):
+        covered = values.any(axis=tuple(i for i in range(values.ndim) if i != axis))
+        indexers[dim] = get_circular_bounds(covered) if dim in CIRCULAR_DIMS else get_bounds(covered)
+    if all(isinstance(idx, slice) and idx == slice(0, size) for idx, size in zip(indexers.values(), values.shape)):
+        return dataset, mask
+    cropped_dataset, cropped_mask = dataset.isel(indexers), mask.isel(indexers)
+    for dim, idx in indexers.items():
+        if not isinstance(idx, slice):
+            cropped_dataset = unwrap_longitudes(cropped_dataset, dim)
+            cropped_mask = unwrap_longitudes(cropped_mask, dim)
+    return cropped_dataset, cropped_mask
+
+
+def get_bounds(covered):
+    idx = np.flatnonzero(covered)
+    return slice(int(idx[0]), int(idx[-1]) + 1)
+
+
+def get_circular_bounds(covered):
+    size = len(covered)
+    idx = np.flatnonzero(covered)
+    if len(idx) == size:
+        return slice(0, size)
+    # the crop is everything but the widest circular gap between covered points
+    gaps = np.diff(np.append(idx, idx[0] + size))
+    widest = np.argmax(gaps)
+    start, stop = int(idx[(widest + 1) % len(idx)]), int(idx[widest]) + 1
+    if start < stop:
+        return slice(start, stop)
+    return np.concatenate([np.arange(start, size), np.arange(0, stop)])
+
+
+def unwrap_longitudes(data, dim):
+    if dim not in data.coords:
+        return data
+    # a copy, the values of an index coordinate are shared with the uncropped data
+    lon = np.array(data[dim].values, dtype=float)
+    wrapped = np.flatnonzero(np.diff(lon) < 0)
+    if not len(wrapped):
+        return data
+    # a crop across the seam of a 0..360 grid goes below 0, one across the dateline of a -180..180 grid above 180
+    if lon[0] - 360. < -180.:
+        lon[wrapped[0] + 1:] += 360.
+    else:
+        lon[:wrapped[0] + 1] -= 360.
+    return data.assign_coords({dim: data[dim].copy(data=lon)})
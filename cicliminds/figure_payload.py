@@ -0,0 +1,16 @@
+import io
+import pickle
+
+
+def dump_figure(fig):
+    return pickle.dumps(fig, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_figure(payload):
+    return pickle.loads(payload)
+
+
+def export_figure(fig, fmt="png"):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt)
+    return buf.getvalue()
@@ -1,5 +1,4 @@
 from dataclasses import fields
-from cicliminds_lib.plotting.config import RecipeConfig
 
 
 class UnitFactorConverter:
@@ -7,6 +6,11 @@ class UnitFactorConverter:
         "day": 1
     }
 
+    @staticmethod
+    def _get_config_fields():
+        from cicliminds_lib.plotting.config import RecipeConfig  # pylint: disable=import-outside-toplevel
+        return [f.name for f in fields(RecipeConfig)]
+
     @classmethod
     def from_json(cls, value):
         return cls.KEYWORDS.get(value, value)
@@ -29,7 +33,7 @@ class PlotQueryAdapter:
     @classmethod
     def from_json(cls, plot_query, restrictive=True):
         res = {}
-        config_fields = list(f.name for f in fields(RecipeConfig))
+        config_fields = cls._get_config_fields()
         for k, v in plot_query.items():
             if restrictive and k not in config_fields:
                 continue
@@ -46,7 +50,7 @@ class PlotQueryAdapter:
     @classmethod
     def to_json(cls, plot_config_patch, restrictive=True):
         res = {}
-        config_fields = list(f.name for f in fields(RecipeConfig))
+        config_fields = cls._get_config_fields()
         for k, v in plot_config_patch.items():
             if restrictive and k not in config_fields:
                 continue
@@ -1,17 +1,90 @@
-from cicliminds_lib.plotting.recipes.means_of_hists import MeansOfHistsRecipe
-from cicliminds_lib.plotting.recipes.means_of_hists import MeansOfHistsDiffRecipe
-from cicliminds_lib.plotting.recipes.mean_val import MeanValRecipe
-from cicliminds_lib.plotting.recipes.mean_val import MeanValDiffRecipe
-from cicliminds_lib.plotting.recipes.time_series import TimeSeriesRecipe
-from cicliminds_lib.plotting.recipes.time_series import TimeSeriesDiffRecipe
-
-PLOT_TYPES_SPEC = {
-    "fldmean last": [MeansOfHistsRecipe, MeansOfHistsDiffRecipe],
-    "mean val": [MeanValRecipe, MeanValDiffRecipe],
-    "time series": [TimeSeriesRecipe, TimeSeriesDiffRecipe]
+from importlib import import_module
+from collections.abc import Mapping
+
+from cicliminds import settings
+
+PLOT_TYPES_ENTRY_POINT_GROUP = "cicliminds.plot_types"
+
+
+class PlotTypesRegistry(Mapping):
+    def __init__(self, recipe_paths, entry_point_group=None):
+        self._recipe_paths = dict(recipe_paths)
+        self._recipes = {}
+        self._entry_point_group = entry_point_group
+        self._entry_points = None
+
+    def register(self, plot_type, recipes):
+        self._recipe_paths[plot_type] = recipes
+        self._recipes.pop(plot_type, None)
+
+    def __getitem__(self, plot_type):
+        if plot_type not in self._recipes:
+            self._recipes[plot_type] = self._load_recipes(plot_type)
+        return self._recipes[plot_type]
+
+    def __iter__(self):
+        yield from self._get_recipe_paths()
+
+    def __len__(self):
+        return len(self._get_recipe_paths())
+
+    def _get_recipe_paths(self):
+        if self._entry_points is None:
+            self._entry_points = get_entry_points(self._entry_point_group) if self._entry_point_group else {}
+        return {**self._recipe_paths, **self._entry_points}
+
+    def _load_recipes(self, plot_type):
+        recipe_paths = self._get_recipe_paths()[plot_type]
+        if hasattr(recipe_paths, "load"):
+            return list(recipe_paths.load())
+        return [import_object(recipe_path) if isinstance(recipe_path, str) else recipe_path
+                for recipe_path in recipe_paths]
+
+
+def import_object(path):
+    module_name, object_name = path.split(":")
+    return getattr(import_module(module_name), object_name)
+
+
+def get_entry_points(group):
+    from importlib.metadata import entry_points  # pylint: disable=import-outside-toplevel
+    found = entry_points()
+    if hasattr(found, "select"):
+        found = found.select(group=group)
+    else:
+        found = found.get(group, [])
+    return {entry_point.name: entry_point for entry_point in found}
+
+
+FLDMEAN_LAST_RECIPES = {
+    "sliding": ["cicliminds.sliding_hists:SlidingMeansOfHistsRecipe",
+                "cicliminds.sliding_hists:SlidingMeansOfHistsDiffRecipe"],
+    "lib": ["cicliminds_lib.plotting.recipes.means_of_hists:MeansOfHistsRecipe",
+            "cicliminds_lib.plotting.recipes.means_of_hists:MeansOfHistsDiffRecipe"]
 }
 
 
+def get_fldmean_last_recipes(hist_engine):
+    if hist_engine not in FLDMEAN_LAST_RECIPES:
+        raise ValueError(f"Unknown histogram engine: {hist_engine}. Expected one of {list(FLDMEAN_LAST_RECIPES)}")
+    return FLDMEAN_LAST_RECIPES[hist_engine]
+
+
+PLOT_TYPES_SPEC = PlotTypesRegistry({
+    "fldmean last": get_fldmean_last_recipes(settings.HIST_ENGINE),
+    "mean val": ["cicliminds_lib.plotting.recipes.mean_val:MeanValRecipe",
+                 "cicliminds_lib.plotting.recipes.mean_val:MeanValDiffRecipe"],
+    "time series": ["cicliminds_lib.plotting.recipes.time_series:TimeSeriesRecipe",
+                    "cicliminds_lib.plotting.recipes.time_series:TimeSeriesDiffRecipe"]
+}, PLOT_TYPES_ENTRY_POINT_GROUP)
+
+FLDMEAN_PLOT_TYPES = ["time series"]
+
+
 def get_plot_recipe_by_query(plot_query):
     plot_recipe = PLOT_TYPES_SPEC[plot_query["plot_type"]][int(plot_query["subtract_reference"])]
     return plot_recipe
+
+
+def is_fldmean_plot_query(plot_query):
+    return plot_query["plot_type"] in FLDMEAN_PLOT_TYPES and not plot_query["subtract_reference"]
@@ -1,4 +1,3 @@
-from copy import deepcopy
 import numpy as np
 
 
@@ -13,8 +12,8 @@ def blocks_to_json_like(blocks):
 def expand_field(blocks, field, values):
     for block in blocks:
         for value in values:
-            new_block = deepcopy(block)
-            new_block[field] = deepcopy(value)
+            new_block = dict(block)
+            new_block[field] = value
             yield new_block
 
 
@@ -1,11 +1,13 @@
 import numpy as np
 import pandas as pd
 
-from cicliminds_lib.query.datasets import apply_scenario_filter
 from cicliminds.interface.query_builder.basic_expanders import expand_field
 from cicliminds.interface.query_builder.basic_expanders import drop_nonexisting_blocks
 from cicliminds.interface.query_builder.basic_expanders import reduce_values_to_existing
 
+SCENARIO_GROUP_FIELDS = ["model", "init_params", "variable", "frequency"]
+EXPANDED_FIELDS = ["variable", "model", "init_params", "frequency", "scenario"]
+
 
 def expand_filters(datasets, filter_values, agg_params):
     mask = pd.Series(np.full(datasets.shape[0], True), index=datasets.index)
@@ -22,6 +24,25 @@ def expand_filters(datasets, filter_values, agg_params):
     yield from (block for block, _ in blocks_with_mask)
 
 
+def count_filter_blocks(datasets, filter_values, agg_params):
+    mask = pd.Series(np.full(datasets.shape[0], True), index=datasets.index)
+    for field in EXPANDED_FIELDS:
+        if filter_values[field]:
+            mask &= datasets[field].isin(filter_values[field])
+    block_fields = ["variable", "frequency"]
+    if not agg_params["aggregate_models"]:
+        block_fields.append("model")
+    if not agg_params["aggregate_model_ensembles"]:
+        block_fields.append("init_params")
+    scenario_sets = get_scenario_sets(filter_values, agg_params["aggregate_years"],
+                                      agg_params["aggregate_scenarios"], datasets)
+    res = 0
+    for scenarios in scenario_sets:
+        full_mask = get_full_scenarios_mask(datasets, mask, [scenarios])
+        res += datasets.loc[full_mask.values, block_fields].drop_duplicates().shape[0]
+    return res
+
+
 def expand_model_field(blocks_with_mask, field, filter_values, agg, datasets):
     values = filter_values[field]
     if not values:
@@ -35,17 +56,7 @@ def expand_model_field(blocks_with_mask, field, filter_values, agg, datasets):
 
 
 def expand_model_scenarios(blocks_with_mask, filter_values, agg_scenarios, agg_years, datasets):
-    values = filter_values["scenario"]
-    if not values:
-        values = datasets["scenario"].unique()
-
-    if agg_scenarios:
-        values = [values]
-    elif agg_years:
-        values = _get_scenario_pairs(values)
-    else:
-        values = [[i] for i in values]
-
+    values = get_scenario_sets(filter_values, agg_scenarios, agg_years, datasets)
     for block, known_mask in blocks_with_mask:
         unfiltered_blocks = expand_field([block], "scenario", values)
         scenarios_column = datasets["scenario"]
@@ -54,6 +65,31 @@ def expand_model_scenarios(blocks_with_mask, filter_values, agg_scenarios, agg_y
         yield from reduce_values_to_existing(only_full_scenarios, scenarios_column)
 
 
+def get_scenario_sets(filter_values, agg_scenarios, agg_years, datasets):
+    values = filter_values["scenario"]
+    if not values:
+        values = datasets["scenario"].unique()
+
+    if agg_scenarios:
+        return [values]
+    if agg_years:
+        return _get_scenario_pairs(values)
+    return [[i] for i in values]
+
+
+def get_full_scenarios_mask(datasets, known_mask, scenario_sets):
+    known = datasets.loc[np.asarray(known_mask), SCENARIO_GROUP_FIELDS + ["scenario"]]
+    group_ids = known.groupby(SCENARIO_GROUP_FIELDS, sort=False, dropna=False).ngroup()
+    full_mask = np.full(datasets.shape[0], False)
+    known_positions = np.flatnonzero(np.asarray(known_mask))
+    for scenarios in scenario_sets:
+        in_set = known["scenario"].isin(scenarios).values
+        scenarios_per_group = known["scenario"][in_set].groupby(group_ids[in_set]).nunique()
+        full_groups = scenarios_per_group.index[scenarios_per_group.values == len(set(scenarios))]
+        full_mask[known_positions[in_set & group_ids.isin(full_groups).values]] = True
+    return pd.Series(full_mask, index=datasets.index)
+
+
 def _get_scenario_pairs(scenarios):
     if "historical" not in scenarios:
         return [[scenario] for scenario in scenarios]
@@ -63,6 +99,7 @@ def _get_scenario_pairs(scenarios):
 
 
 def apply_scenario_filter_to_blocks(blocks_with_mask, datasets):
+    from cicliminds_lib.query.datasets import apply_scenario_filter  # pylint: disable=import-outside-toplevel
     for block, known_mask in blocks_with_mask:
         scenarios = block["scenario"]
         new_mask = apply_scenario_filter(datasets, known_mask, scenarios)
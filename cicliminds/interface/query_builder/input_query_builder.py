@@ -1,5 +1,6 @@
 from cicliminds.interface.query_builder.utils import list_product
 from cicliminds.interface.query_builder.filter_expander import expand_filters
+from cicliminds.interface.query_builder.filter_expander import count_filter_blocks
 from cicliminds.interface.query_builder.basic_expanders import blocks_to_json_like
 from cicliminds.interface.query_builder.basic_expanders import expand_field
 
@@ -13,6 +14,10 @@ def expand_input_queries(datasets, filter_values, agg_params):
     yield from list_product(normalized_data_sources)
 
 
+def count_input_queries(datasets, filter_values, agg_params):
+    return count_filter_blocks(datasets, filter_values, agg_params) * count_model_weights(agg_params)
+
+
 def normalize_data_source_queries(data_sources):
     res = {}
     for source, queries in data_sources.items():
@@ -28,3 +33,10 @@ def expand_model_weights(agg_params):
         model_weights = [model_weights]
     weighted_queries = expand_field([{}], "model_weights", model_weights)
     yield from weighted_queries
+
+
+def count_model_weights(agg_params):
+    model_weights = agg_params["model_weights"] or []
+    if model_weights and agg_params["aggregate_model_weights"]:
+        return len(model_weights)
+    return 1
@@ -1,8 +1,6 @@
-from copy import deepcopy
+from functools import lru_cache
 from dataclasses import asdict
 
-from cicliminds_lib.mask.mask import REFERENCE_REGIONS
-
 from cicliminds.interface.query_builder.basic_expanders import expand_field
 from cicliminds.interface.plot_query_adapter import PlotQueryAdapter
 from cicliminds.interface.plot_types import get_plot_recipe_by_query
@@ -21,6 +19,10 @@ def expand_plot_queries(agg_params):
     yield from res
 
 
+def count_plot_queries(agg_params):
+    return count_regions(agg_params) * len(agg_params["plot_types"])
+
+
 def expand_regions(res, agg_params):
     selected_regions = agg_params["select_regions"] or []
     aggregate_regions = agg_params["aggregate_regions"]
@@ -29,26 +31,42 @@ def expand_regions(res, agg_params):
     elif selected_regions:
         selected_regions = [[r] for r in selected_regions]
     else:
+        from cicliminds_lib.mask.mask import REFERENCE_REGIONS  # pylint: disable=import-outside-toplevel
         selected_regions = [[f'{r.abbrev}'] for r in REFERENCE_REGIONS]
     res = expand_field(res, "regions", selected_regions)
     return res
 
 
+def count_regions(agg_params):
+    selected_regions = agg_params["select_regions"] or []
+    if agg_params["aggregate_regions"]:
+        return 1
+    if selected_regions:
+        return len(selected_regions)
+    from cicliminds_lib.mask.mask import REFERENCE_REGIONS  # pylint: disable=import-outside-toplevel
+    return len(REFERENCE_REGIONS)
+
+
 def expand_plot_types(queries, plot_types):
     res = []
     for block in queries:
         for plot_type in plot_types:
-            new_block = deepcopy(block)
-            new_block.update({
-                "plot_type": plot_type,
-            })
+            new_block = dict(block)
+            new_block["plot_type"] = plot_type
             res.append(new_block)
     return res
 
 
 def append_plot_query_defaults(input_query, plot_query):
-    plot_recipe = get_plot_recipe_by_query(plot_query)
-    plot_config_defaults = asdict(plot_recipe.get_default_config(input_query["datasets"]["variable"][0]))
-    plot_config_defaults.update(plot_query)
-    plot_query_defaults = PlotQueryAdapter.to_json(deepcopy(plot_config_defaults), restrictive=False)
+    variable = input_query["datasets"]["variable"][0]
+    plot_query_defaults = dict(get_plot_query_defaults(plot_query["plot_type"], plot_query["subtract_reference"],
+                                                       variable))
+    plot_query_defaults.update(PlotQueryAdapter.to_json(plot_query, restrictive=False))
     return plot_query_defaults
+
+
+@lru_cache(maxsize=None)
+def get_plot_query_defaults(plot_type, subtract_reference, variable):
+    plot_recipe = get_plot_recipe_by_query({"plot_type": plot_type, "subtract_reference": subtract_reference})
+    plot_config_defaults = asdict(plot_recipe.get_default_config(variable))
+    return PlotQueryAdapter.to_json(plot_config_defaults, restrictive=False)
@@ -1,6 +1,8 @@
 from cicliminds.interface.query_builder.utils import list_product
 from cicliminds.interface.query_builder.input_query_builder import expand_input_queries
+from cicliminds.interface.query_builder.input_query_builder import count_input_queries
 from cicliminds.interface.query_builder.plot_query_builder import expand_plot_queries
+from cicliminds.interface.query_builder.plot_query_builder import count_plot_queries
 from cicliminds.interface.query_builder.plot_query_builder import append_plot_query_defaults
 
 
@@ -13,6 +15,10 @@ def expand_state_into_queries(datasets, filter_values, agg_params):
     yield from set_plot_query_defaults(combined_queries)
 
 
+def count_state_queries(datasets, filter_values, agg_params):
+    return count_input_queries(datasets, filter_values, agg_params) * count_plot_queries(agg_params)
+
+
 def set_plot_query_defaults(queries):
     for query in queries:
         query["plot_query"] = append_plot_query_defaults(query["input_query"], query["plot_query"])
@@ -0,0 +1,35 @@
+import json
+
+from cicliminds.figure_payload import load_figure
+
+EXPORT_WINDOW_SIZE = 16
+
+
+def export_pdf(output_filename, queries, builder, payloads=None, window_size=None):
+    from matplotlib.backends.backend_pdf import PdfPages  # pylint: disable=import-outside-toplevel
+    payloads = payloads or [None]*len(queries)
+    # missing blocks are built one window of pages at a time, so at most one window of payloads waits to be written
+    window_size = window_size or max(EXPORT_WINDOW_SIZE, 2*builder.workers_num)
+    with PdfPages(output_filename) as pdf:
+        pdf.infodict()["query"] = json.dumps(queries, indent=True)
+        for start in range(0, len(queries), window_size):
+            window_idxs = range(start, min(start + window_size, len(queries)))
+            missing_idxs = [idx for idx in window_idxs if payloads[idx] is None]
+            # blocks are built on the executor of the background builds, which the notebook kernel must not race
+            built = builder.submit_many([queries[idx] for idx in missing_idxs]).result() if missing_idxs else []
+            built_payloads = {idx: (payload, info.get("error")) for idx, (payload, info) in zip(missing_idxs, built)}
+            for idx in window_idxs:
+                payload, error = built_payloads.pop(idx) if payloads[idx] is None else (payloads[idx], None)
+                write_pdf_page(pdf, payload, error)
+
+
+def write_pdf_page(pdf, payload, error=None):
+    from matplotlib.figure import Figure  # pylint: disable=import-outside-toplevel
+    # pages are made without pyplot, which the background builds use from their own thread
+    if payload is None:
+        fig = Figure()
+        fig.text(0.05, 0.5, f"Block failed: {error}", wrap=True)
+    else:
+        fig = load_figure(payload)
+    fig.tight_layout()
+    pdf.savefig(fig)
@@ -0,0 +1,112 @@
+import time
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import OrderedDict
+
+PROFILE_MODES = ["", "time", "memory"]
+
+_RECORDER = ContextVar("cicliminds_stage_recorder", default=None)
+
+
+class StageRecorder:
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.stages = OrderedDict()
+        self._peaks = []
+
+    def enter(self):
+        if not self.track_memory:
+            return
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._peaks.append(current)
+        self._peaks.append(current)
+
+    def leave(self, name, wall, cpu):
+        stage = self.stages.setdefault(name, {"wall": 0., "cpu": 0., "calls": 0})
+        stage["wall"] += wall
+        stage["cpu"] += cpu
+        stage["calls"] += 1
+        if not self.track_memory:
+            return
+        peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+        started_at = self._peaks.pop()
+        stage["peak_bytes"] = max(stage.get("peak_bytes", 0), peak - started_at)
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+
+    def get_summary(self, share=1):
+        res = OrderedDict()
+        for name, stage in self.stages.items():
+            res[name] = dict(stage, wall=stage["wall"] / share, cpu=stage["cpu"] / share)
+        return res
+
+
+@contextmanager
+def stage(name):
+    recorder = _RECORDER.get()
+    if recorder is None:
+        yield
+        return
+    recorder.enter()
+    wall_started, cpu_started = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        recorder.leave(name, time.perf_counter() - wall_started, time.thread_time() - cpu_started)
+
+
+@contextmanager
+def record_stages(mode):
+    if not mode:
+        yield None
+        return
+    recorder = StageRecorder(track_memory=mode == "memory")
+    started_tracing = recorder.track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _RECORDER.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _RECORDER.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def merge_stages(*summaries):
+    res = OrderedDict()
+    for summary in summaries:
+        for name, stage in summary.items():
+            if name not in res:
+                res[name] = dict(stage)
+                continue
+            merged = res[name]
+            merged["wall"] += stage["wall"]
+            merged["cpu"] += stage["cpu"]
+            merged["calls"] += stage["calls"]
+            if "peak_bytes" in stage:
+                merged["peak_bytes"] = max(merged.get("peak_bytes", 0), stage["peak_bytes"])
+    return res
+
+
+def format_stages(stages):
+    res = []
+    for name, stage in stages.items():
+        summary = f"{name} {stage['wall']:.2f}s"
+        if "peak_bytes" in stage:
+            summary = f"{summary}/{stage['peak_bytes'] / 1024**2:.0f}MB"
+        res.append(summary)
+    return ", ".join(res)
+
+
+def dump_profile(func, output_file):
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(output_file)
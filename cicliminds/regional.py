@@ -0,0 +1,56 @@
+import numpy as np
+
+FUSED_REGION_DIM = "fused_region"
+
+
+def get_reference_region_names():
+    from cicliminds_lib.mask.mask import REFERENCE_REGIONS  # pylint: disable=import-outside-toplevel
+    return [region.abbrev for region in REFERENCE_REGIONS]
+
+
+def get_region_label(regions):
+    return ",".join(regions)
+
+
+def get_variable_dims(dataset):
+    return {name: variable.dims for name, variable in dataset.data_vars.items()}
+
+
+def get_area_weights(dataset, grid_dims):
+    lat_dim, _ = grid_dims
+    return np.cos(np.deg2rad(dataset[lat_dim]))
+
+
+def get_regional_fldmeans(dataset, masks, grid_dims, labels):
+    import xarray as xr  # pylint: disable=import-outside-toplevel
+    stacked_masks = xr.concat([mask.astype(float) for mask in masks], dim=FUSED_REGION_DIM)
+    weighted_masks = stacked_masks * get_area_weights(dataset, grid_dims)
+    reduced = {}
+    for name, variable in dataset.data_vars.items():
+        grid_dims_found = [dim for dim in grid_dims if dim in variable.dims]
+        if not grid_dims_found:
+            reduced[name] = variable
+            continue
+        if len(grid_dims_found) != len(grid_dims):
+            continue
+        total = xr.dot(variable.fillna(0), weighted_masks, dims=grid_dims)
+        norm = xr.dot(variable.notnull(), weighted_masks, dims=grid_dims)
+        fldmean = total / norm.where(norm > 0)
+        fldmean.attrs = variable.attrs
+        reduced[name] = fldmean
+    coords = {name: coord for name, coord in dataset.coords.items() if not set(coord.dims) & set(grid_dims)}
+    coords[FUSED_REGION_DIM] = labels
+    return xr.Dataset(reduced, coords=coords, attrs=dataset.attrs)
+
+
+def select_fused_region(regional_fldmeans, label, variable_dims, grid_dims):
+    import xarray as xr  # pylint: disable=import-outside-toplevel
+    selected = regional_fldmeans.sel({FUSED_REGION_DIM: label}, drop=True)
+    res = {}
+    for name, variable in selected.data_vars.items():
+        if not any(dim in variable_dims[name] for dim in grid_dims):
+            res[name] = variable
+            continue
+        res[name] = variable.expand_dims({dim: [0.] for dim in grid_dims}).transpose(*variable_dims[name])
+        res[name].attrs = variable.attrs
+    return xr.Dataset(res, coords=selected.coords, attrs=selected.attrs)
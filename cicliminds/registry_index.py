@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+
+class RegistryIndex:
+    def __init__(self, datasets, fields):
+        self.index = datasets.index
+        self.rows_num = datasets.shape[0]
+        self.codes = {}
+        self.values = {}
+        self.bitsets = {}
+        for field in fields:
+            codes, values = pd.factorize(datasets[field])
+            self.codes[field] = codes
+            self.values[field] = pd.Index(values)
+            self.bitsets[field] = self._get_value_bitsets(codes, len(values))
+        self._full_bitset = np.packbits(np.full(self.rows_num, True))
+
+    def get_mask(self, filter_values):
+        bitset = self._full_bitset
+        for field, values in filter_values.items():
+            if not values or field not in self.bitsets:
+                continue
+            codes = self.values[field].get_indexer(values)
+            field_bitset = np.bitwise_or.reduce(self.bitsets[field][codes[codes >= 0]], axis=0)
+            bitset = bitset & field_bitset
+        mask = np.unpackbits(bitset, count=self.rows_num).astype(bool)
+        return pd.Series(mask, index=self.index)
+
+    def get_options(self, field, mask):
+        codes = self.codes[field][np.asarray(mask)]
+        present = np.bincount(codes[codes >= 0], minlength=len(self.values[field])) > 0
+        return self.values[field][present]
+
+    def _get_value_bitsets(self, codes, values_num):
+        bitsets = np.zeros((values_num, self.rows_num), dtype=bool)
+        known = codes >= 0
+        bitsets[codes[known], np.flatnonzero(known)] = True
+        return np.packbits(bitsets, axis=1)
@@ -0,0 +1,209 @@
+import json
+import time
+import threading
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import urlsplit
+from urllib.parse import parse_qs
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import ThreadingHTTPServer
+from http.server import BaseHTTPRequestHandler
+
+from cicliminds.figure_payload import load_figure
+from cicliminds.figure_payload import export_figure
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf"
+}
+LATENCY_BUCKETS = [0.1, 0.5, 1., 5., 10., 30., 60., 300.]
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class RenderService:
+    def __init__(self, builder, max_queue=32, timeout=300.):
+        self.builder = builder
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.metrics = RenderMetrics()
+        self._queued = 0
+        self._timed_out = 0
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    def render(self, query, fmt="png"):
+        started = time.perf_counter()
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self.metrics.add_request("rejected", time.perf_counter() - started)
+                raise QueueFullError(f"{self._queued} blocks are already queued")
+            self._queued += 1
+        slot = {"released": False, "timed_out": False}
+        try:
+            future = self.builder.submit_many([query])
+        except Exception:
+            self._release_slot(slot)
+            self.metrics.add_request("failed", time.perf_counter() - started)
+            raise
+        # the slot stays taken until the block is rendered, also when the request times out before that
+        future.add_done_callback(partial(self._release_slot, slot))
+        try:
+            (payload, info), = future.result(timeout=self.timeout)
+            if payload is None:
+                raise RuntimeError(info["error"])
+            content = self.export(payload, fmt)
+        except FutureTimeoutError:
+            self._mark_timed_out(slot)
+            self.metrics.add_request("timeout", time.perf_counter() - started)
+            raise
+        except Exception:
+            self.metrics.add_request("failed", time.perf_counter() - started)
+            raise
+        self.metrics.add_request("cached" if info["cached"] else "rendered", time.perf_counter() - started)
+        return content, info
+
+    def export(self, payload, fmt):
+        # payloads are pickled after their figures are closed, so they are not registered in pyplot when loaded,
+        # but matplotlib shares font and text layout caches between figures and is not thread-safe
+        with self._export_lock:
+            return export_figure(load_figure(payload), fmt)
+
+    def get_queue_depth(self):
+        return self._queued
+
+    def format_metrics(self):
+        with self._lock:
+            queued, timed_out = self._queued, self._timed_out
+        lines = self.metrics.format()
+        lines.append("# TYPE cicliminds_queue_depth gauge")
+        lines.append(f"cicliminds_queue_depth {queued}")
+        lines.append("# TYPE cicliminds_renders_in_flight gauge")
+        lines.append(f"cicliminds_renders_in_flight {queued - timed_out}")
+        lines.append("# TYPE cicliminds_renders_timed_out gauge")
+        lines.append(f"cicliminds_renders_timed_out {timed_out}")
+        lines.append("# TYPE cicliminds_cache_events_total counter")
+        for name, cache in self._get_caches().items():
+            for event, count in cache.stats.items():
+                lines.append(f'cicliminds_cache_events_total{{cache="{name}",event="{event}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def _get_caches(self):
+        caches = {"result": self.builder.result_cache}
+        # with several workers, blocks are rendered in worker processes, whose caches are not seen from here
+        if self.builder.workers_num <= 1:
+            caches.update({"inputs": self.builder.inputs_cache, "inputs_store": self.builder.inputs_store,
+                           "fldmean_store": self.builder.fldmean_store, "mask": self.builder.mask_cache})
+        return {name: cache for name, cache in caches.items() if cache is not None}
+
+    def _release_slot(self, slot, _future=None):
+        with self._lock:
+            self._queued -= 1
+            if slot["timed_out"]:
+                self._timed_out -= 1
+            slot["released"] = True
+
+    def _mark_timed_out(self, slot):
+        with self._lock:
+            # the block may have been rendered since the request timed out
+            if not slot["released"]:
+                self._timed_out += 1
+                slot["timed_out"] = True
+
+
+class RenderMetrics:
+    def __init__(self):
+        self.requests = {}
+        self.latency_buckets = [0]*len(LATENCY_BUCKETS)
+        self.latency_sum = 0.
+        self.latency_count = 0
+        self._lock = threading.Lock()
+
+    def add_request(self, status, latency):
+        with self._lock:
+            self.requests[status] = self.requests.get(status, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.latency_buckets[i] += 1
+            self.latency_sum += latency
+            self.latency_count += 1
+
+    def format(self):
+        with self._lock:
+            lines = ["# TYPE cicliminds_requests_total counter"]
+            for status, count in self.requests.items():
+                lines.append(f'cicliminds_requests_total{{status="{status}"}} {count}')
+            lines.append("# TYPE cicliminds_request_latency_seconds histogram")
+            for bound, count in zip(LATENCY_BUCKETS, self.latency_buckets):
+                lines.append(f'cicliminds_request_latency_seconds_bucket{{le="{bound}"}} {count}')
+            lines.append(f'cicliminds_request_latency_seconds_bucket{{le="+Inf"}} {self.latency_count}')
+            lines.append(f"cicliminds_request_latency_seconds_sum {self.latency_sum}")
+            lines.append(f"cicliminds_request_latency_seconds_count {self.latency_count}")
+        return lines
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            self._send(HTTPStatus.OK, self.service.format_metrics().encode("utf-8"), "text/plain; version=0.0.4")
+            return
+        if path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok", "queue_depth": self.service.get_queue_depth()})
+            return
+        self._send_json(HTTPStatus.NOT_FOUND, {"error": f"unknown path: {path}"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        url = urlsplit(self.path)
+        if url.path != "/render":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"unknown path: {url.path}"})
+            return
+        fmt = parse_qs(url.query).get("format", ["png"])[0]
+        if fmt not in CONTENT_TYPES:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"unknown format: {fmt}. Expected one of "
+                                                              f"{list(CONTENT_TYPES)}"})
+            return
+        try:
+            query = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            query = {"input_query": query["input_query"], "plot_query": query["plot_query"]}
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"invalid block query: {e!r}"})
+            return
+        try:
+            content, info = self.service.render(query, fmt)
+        except QueueFullError as e:
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)})
+            return
+        except FutureTimeoutError:
+            self._send_json(HTTPStatus.GATEWAY_TIMEOUT, {"error": f"not rendered in {self.service.timeout}s"})
+            return
+        except Exception as e:  # pylint: disable=broad-except
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(e)})
+            return
+        self._send(HTTPStatus.OK, content, CONTENT_TYPES[fmt],
+                   {"X-Cicliminds-Cached": str(info["cached"]).lower(),
+                    "X-Cicliminds-Elapsed": f"{info['elapsed']:.3f}"})
+
+    def _send_json(self, status, content):
+        self._send(status, json.dumps(content).encode("utf-8"), "application/json")
+
+    def _send(self, status, content, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def make_server(service, host="127.0.0.1", port=8765):
+    handler = type("BoundRenderRequestHandler", (RenderRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -1,7 +1,26 @@
-import matplotlib.pyplot as plt
+import os
+
+CACHE_DIR = os.environ.get("CICLIMINDS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cicliminds"))
+RESULT_CACHE_MEMORY_ITEMS = int(os.environ.get("CICLIMINDS_RESULT_CACHE_MEMORY_ITEMS", "128"))
+RESULT_CACHE_DISK_BYTES = int(os.environ.get("CICLIMINDS_RESULT_CACHE_DISK_BYTES", str(2 * 1024**3)))
+INPUTS_STORE_BYTES = int(os.environ.get("CICLIMINDS_INPUTS_STORE_BYTES", "0"))
+FLDMEAN_STORE_BYTES = int(os.environ.get("CICLIMINDS_FLDMEAN_STORE_BYTES", str(1024**3)))
+INPUTS_CACHE_ITEMS = int(os.environ.get("CICLIMINDS_INPUTS_CACHE_ITEMS", "2"))
+MASK_CACHE_MEMORY_ITEMS = int(os.environ.get("CICLIMINDS_MASK_CACHE_MEMORY_ITEMS", "512"))
+BUILD_WORKERS = int(os.environ.get("CICLIMINDS_BUILD_WORKERS", "1"))
+CATALOGUE_PATH = os.environ.get("CICLIMINDS_CATALOGUE_PATH")
+CATALOGUE_METADATA = os.environ.get("CICLIMINDS_CATALOGUE_METADATA", "0") == "1"
+PROFILE = os.environ.get("CICLIMINDS_PROFILE", "time")
+DASK_CHUNKS = os.environ.get("CICLIMINDS_DASK_CHUNKS", "")
+DASK_SCHEDULER = os.environ.get("CICLIMINDS_DASK_SCHEDULER", "threads")
+DASK_WORKERS = int(os.environ.get("CICLIMINDS_DASK_WORKERS", "0"))
+DASK_MEMORY_LIMIT = os.environ.get("CICLIMINDS_DASK_MEMORY_LIMIT", "auto")
+HIST_ENGINE = os.environ.get("CICLIMINDS_HIST_ENGINE", "lib")
+BUILD_START_METHOD = os.environ.get("CICLIMINDS_BUILD_START_METHOD", "spawn")
 
 
 def set_plt_reasonable_defaults():
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
     plt.rcParams["figure.figsize"] = (12, 8)
     plt.rcParams['figure.constrained_layout.use'] = True
     plt.rcParams["xtick.direction"] = "in"
@@ -0,0 +1,144 @@
+import numpy as np
+
+from cicliminds_lib.plotting.recipes.means_of_hists import MeansOfHistsRecipe
+from cicliminds_lib.plotting.recipes.means_of_hists import MeansOfHistsDiffRecipe
+
+from cicliminds.cache.mask_cache import MaskCache
+from cicliminds.regional import get_area_weights
+from cicliminds.time_plan import TIME_DIM
+from cicliminds.time_plan import get_window_bounds
+
+HIST_BINS_NUM = 100
+
+
+class SlidingMeansOfHistsRecipe(MeansOfHistsRecipe):
+    @classmethod
+    def plot(cls, ax, config, inputs):
+        if inputs.get("model_weights") is not None:
+            return super().plot(ax, config, inputs)
+        bin_edges, hists, labels = get_recipe_histograms(config, inputs)
+        return cls.draw(ax, bin_edges, hists, labels)
+
+    @classmethod
+    def draw(cls, ax, bin_edges, hists, labels):
+        for hist, label in zip(hists, labels):
+            ax.stairs(hist, bin_edges, label=label)
+        ax.legend()
+
+
+class SlidingMeansOfHistsDiffRecipe(MeansOfHistsDiffRecipe):
+    @classmethod
+    def plot(cls, ax, config, inputs):
+        if inputs.get("model_weights") is not None or not has_comparable_windows(config):
+            return super().plot(ax, config, inputs)
+        bin_edges, hists, labels = get_recipe_histograms(config, inputs)
+        return cls.draw(ax, bin_edges, hists[1:] - hists[0], labels[1:])
+
+    @classmethod
+    def draw(cls, ax, bin_edges, hists, labels):
+        ax.axhline(0, color="black", linewidth=1)
+        for hist, label in zip(hists, labels):
+            ax.stairs(hist, bin_edges, label=label)
+        ax.legend()
+
+
+def has_comparable_windows(config):
+    # without normalization, windows of different sizes can not be compared by subtracting their counts
+    return config["normalize_histograms"] or config["reference_window_size"] == config["sliding_window_size"]
+
+
+def get_recipe_histograms(config, inputs):
+    from cicliminds_lib.plotting._helpers import _get_variable_name  # pylint: disable=import-outside-toplevel
+    dataset = inputs["datasets"]
+    values, weights = get_histogram_inputs(dataset, _get_variable_name(dataset), config.get("unit_factor", 1))
+    windows = get_window_bounds(values.shape[0], config["reference_window_size"],
+                                config["sliding_window_size"], config["slide_step"])
+    bin_edges = get_bin_edges(values)
+    hists = get_fldmean_histograms(values, weights, bin_edges, windows, config["normalize_histograms"])
+    years = get_time_years(dataset[TIME_DIM])
+    labels = [f"{years[start]}-{years[stop - 1]}" for start, stop in windows]
+    return bin_edges, hists, labels
+
+
+def get_histogram_inputs(dataset, variable, unit_factor=1):
+    data = dataset[variable]
+    other_dims = [dim for dim in data.dims if dim != TIME_DIM]
+    data = data.transpose(TIME_DIM, *other_dims)
+    values = to_float_values(np.asarray(data.values), unit_factor).reshape(data.shape[0], -1)
+    grid_dims = MaskCache.get_grid_dims(dataset)
+    if grid_dims is None:
+        weights = np.ones(values.shape[1])
+    else:
+        point_data = data.isel({TIME_DIM: 0}, drop=True)
+        weights = get_area_weights(dataset, grid_dims).broadcast_like(point_data).transpose(*other_dims)
+        weights = np.asarray(weights.values, dtype=float).reshape(-1)
+    # points outside of the regions are NaN over the whole time axis, so they are dropped before binning
+    has_data = np.isfinite(values).any(axis=0)
+    return values[:, has_data], weights[has_data]
+
+
+def to_float_values(values, unit_factor):
+    if values.dtype.kind == "m":
+        if not isinstance(unit_factor, np.timedelta64):
+            unit_factor = np.timedelta64(1, "D")
+        return values / unit_factor
+    return np.asarray(values / unit_factor, dtype=float)
+
+
+def get_time_years(time):
+    import cftime  # pylint: disable=import-outside-toplevel
+    return [date.year for date in cftime.num2date(time.data, time.attrs["units"], time.attrs["calendar"])]
+
+
+def get_bin_edges(values, bins_num=HIST_BINS_NUM):
+    finite = values[np.isfinite(values)]
+    if not finite.size:
+        return np.linspace(0., 1., bins_num + 1)
+    return np.histogram_bin_edges(finite, bins=bins_num)
+
+
+def get_bin_indices(values, bin_edges):
+    bins_num = len(bin_edges) - 1
+    res = np.searchsorted(bin_edges, values, side="right") - 1
+    # the last bin is closed, as in np.histogram
+    res[values == bin_edges[-1]] = bins_num - 1
+    res[~np.isfinite(values) | (res < 0) | (res >= bins_num)] = -1
+    return res
+
+
+def iter_window_counts(bin_idx, bins_num, windows):
+    points_num = bin_idx.shape[1]
+    counts = np.zeros((points_num, bins_num), dtype=np.int64)
+    flat_counts = counts.reshape(-1)
+    point_offsets = np.arange(points_num) * bins_num
+    start, stop = 0, 0
+    for window_start, window_stop in windows:
+        if window_start >= stop or window_start < start or window_stop < stop:
+            counts[:] = 0
+            start, stop = window_start, window_start
+        _update_counts(flat_counts, bin_idx[start:window_start], point_offsets, -1)
+        _update_counts(flat_counts, bin_idx[stop:window_stop], point_offsets, 1)
+        start, stop = window_start, window_stop
+        yield counts
+
+
+def _update_counts(flat_counts, steps_bin_idx, point_offsets, sign):
+    if not steps_bin_idx.size:
+        return
+    valid = steps_bin_idx >= 0
+    np.add.at(flat_counts, (steps_bin_idx + point_offsets)[valid], sign)
+
+
+def get_fldmean_histograms(values, weights, bin_edges, windows, normalize=False):
+    bins_num = len(bin_edges) - 1
+    bin_idx = get_bin_indices(values, bin_edges)
+    res = np.zeros((len(windows), bins_num))
+    for i, counts in enumerate(iter_window_counts(bin_idx, bins_num, windows)):
+        has_data = counts.any(axis=1)
+        norm = weights[has_data].sum()
+        if norm <= 0:
+            continue
+        res[i] = weights @ counts / norm
+        if normalize and res[i].sum() > 0:
+            res[i] /= res[i].sum()
+    return res
@@ -0,0 +1,65 @@
+import numpy as np
+
+TIME_DIM = "time"
+
+
+def get_reference_window(time_len, reference_window_size):
+    return 0, min(reference_window_size, time_len)
+
+
+def get_last_window(time_len, sliding_window_size):
+    return max(time_len - sliding_window_size, 0), time_len
+
+
+def get_window_bounds(time_len, reference_window_size, sliding_window_size, slide_step):
+    res = [get_reference_window(time_len, reference_window_size)]
+    for start in range(reference_window_size, time_len - sliding_window_size + 1, slide_step):
+        res.append((start, start + sliding_window_size))
+    return res
+
+
+def get_mean_val_ranges(plot_query, time_len):
+    res = [get_last_window(time_len, plot_query["sliding_window_size"])]
+    if plot_query["subtract_reference"]:
+        res.append(get_reference_window(time_len, plot_query["reference_window_size"]))
+    return res
+
+
+TIME_PLANNERS = {
+    "mean val": get_mean_val_ranges
+}
+
+
+def get_time_ranges(plot_query, time_len):
+    planner = TIME_PLANNERS.get(plot_query["plot_type"])
+    if planner is None:
+        return None
+    ranges = merge_ranges(planner(plot_query, time_len))
+    if ranges == [(0, time_len)]:
+        return None
+    return ranges
+
+
+def merge_ranges(ranges):
+    res = []
+    for start, stop in sorted(ranges):
+        if res and start <= res[-1][1]:
+            res[-1] = (res[-1][0], max(res[-1][1], stop))
+            continue
+        res.append((start, stop))
+    return res
+
+
+def select_time_ranges(dataset, ranges):
+    if ranges is None:
+        return dataset
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        return dataset.isel({TIME_DIM: slice(start, stop)})
+    return dataset.isel({TIME_DIM: np.concatenate([np.arange(start, stop) for start, stop in ranges])})
+
+
+def get_init_year(dataset):
+    import cftime  # pylint: disable=import-outside-toplevel
+    time = dataset[TIME_DIM]
+    return cftime.num2date(time.data[0], time.attrs["units"], time.attrs["calendar"]).year
@@ -1,39 +1,102 @@
 import json
-from ipywidgets import HBox, VBox, Button, Textarea, Output
+from ipywidgets import HBox, VBox, Button, Textarea, Output, Label
 from cicliminds.widgets.common import ObserverWidget
+from cicliminds.figure_payload import load_figure
+from cicliminds.profiling import format_stages
 
 
 class BlockWidget(ObserverWidget):
     def __init__(self, query):
         self.state = {}
-        self.state["config_widget"] = Textarea(value=json.dumps(query, indent=True),
-                                               layout={"flex": "6 1 260px", "height": "10em",
-                                                       "overflow": "hidden", "margin": "0 20px 0 0"})
-        self.state["unstage_button"] = self._get_unstage_button()
-        self.state["rebuild_button"] = self._get_rebuild_button()
-        self.state["output"] = Output(layout={"flex": "1 1 0px"})
-        self._real_output = None
+        self._config = json.dumps(query, indent=True)
+        self._status = ""
+        self._stages = ""
+        self._payload = None
+        self._payload_query = None
+        self._view = None
         super().__init__()
 
     def render(self):
-        block = VBox([
-            HBox([self.state["config_widget"], VBox([self.state["unstage_button"], self.state["rebuild_button"]],
+        if self._view is not None:
+            return self._view
+        self.state["config_widget"] = self._get_config_widget()
+        self.state["unstage_button"] = self._get_unstage_button()
+        self.state["rebuild_button"] = self._get_rebuild_button()
+        self.state["status"] = Label(self._status)
+        self.state["stages"] = Label(self._stages)
+        self.state["output"] = Output(layout={"flex": "1 1 0px"})
+        if self._payload is not None:
+            self.show_figure(load_figure(self._payload))
+        self._view = VBox([
+            HBox([self.state["config_widget"], VBox([self.state["unstage_button"], self.state["rebuild_button"],
+                                                     self.state["status"], self.state["stages"]],
                  layout={"flex": "1 1 100px", "margin": "0 20px 0 0"})]),
             self.state["output"]
         ], layout={"margin": "5px 0"})
-        return block
+        return self._view
+
+    def close_view(self):
+        if self._view is None:
+            return
+        close_widget_tree(self._view)
+        self.state = {}
+        self._view = None
+
+    def is_rendered(self):
+        return self._view is not None
 
     def get_query(self):
-        return json.loads(self.state["config_widget"].value)
+        return json.loads(self._config)
 
     def capture_output(self):
         return self.state["output"]
 
-    def replace_real_output(self, new_output):
-        self._real_output = new_output
+    def show_figure(self, fig):
+        if "output" not in self.state:
+            return
+        self.state["output"].outputs = tuple()
+        self.state["output"].append_display_data(fig)
 
-    def get_real_output(self):
-        return self._real_output
+    def set_status(self, status, elapsed=None, error=None):
+        if elapsed is not None:
+            status = f"{status} ({elapsed:.1f}s)"
+        if error is not None:
+            status = f"{status}: {error}"
+        self._status = status
+        if "status" in self.state:
+            self.state["status"].value = status
+
+    def set_stages(self, stages):
+        self._stages = format_stages(stages) if stages else ""
+        if "stages" in self.state:
+            self.state["stages"].value = self._stages
+
+    def set_result(self, query, payload):
+        self.set_payload(query, payload)
+        if self.is_rendered():
+            self.show_figure(load_figure(payload))
+
+    def set_payload(self, query, payload):
+        self._payload_query = query
+        self._payload = payload
+
+    def get_payload(self, query):
+        if query != self._payload_query:
+            return None
+        return self._payload
+
+    def has_payload(self):
+        return self._payload is not None
+
+    def _get_config_widget(self):
+        config_widget = Textarea(value=self._config,
+                                 layout={"flex": "6 1 260px", "height": "10em",
+                                         "overflow": "hidden", "margin": "0 20px 0 0"})
+        config_widget.observe(self._config_changed, names="value")
+        return config_widget
+
+    def _config_changed(self, change):
+        self._config = change["new"]
 
     def _get_unstage_button(self):
         unstage_button = Button(description="Unstage", button_style="danger", icon="trash")
@@ -44,3 +107,9 @@ class BlockWidget(ObserverWidget):
         rebuild_button = Button(description="Rebuild", button_style="success", icon="redo")
         rebuild_button.on_click(self.trigger)
         return rebuild_button
+
+
+def close_widget_tree(widget):
+    for child in getattr(widget, "children", ()):
+        close_widget_tree(child)
+    widget.close()
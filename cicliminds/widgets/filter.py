@@ -1,12 +1,11 @@
 from functools import partial
 
-import numpy as np
-import pandas as pd
 from ipywidgets import Label, VBox, HBox, Button, SelectMultiple
 
 from cicliminds.widgets.common import ObserverWidget
-from cicliminds_lib.query.datasets import get_shallow_filters_mask
-from cicliminds.interface.query_builder.filter_expander import expand_model_scenarios
+from cicliminds.registry_index import RegistryIndex
+from cicliminds.interface.query_builder.filter_expander import get_scenario_sets
+from cicliminds.interface.query_builder.filter_expander import get_full_scenarios_mask
 
 
 class FilterWidget(ObserverWidget):
@@ -15,6 +14,7 @@ class FilterWidget(ObserverWidget):
 
     def __init__(self, datasets):
         self.datasets = datasets.copy()
+        self.index = RegistryIndex(self.datasets, self.FILTER_FIELDS)
         self.button_reset = self._get_reset_button()
         self.button_refresh = self._get_refresh_button()
         self.filter_widgets = self._get_filter_widgets()
@@ -29,21 +29,19 @@ class FilterWidget(ObserverWidget):
         return filter_widget
 
     def get_filtered_dataset(self, agg_params):
+        return self.datasets[self.get_filtered_mask(agg_params)].copy()
+
+    def get_filtered_mask(self, agg_params):
         filter_values = self.get_filter_values()
-        mask = get_shallow_filters_mask(self.datasets, filter_values)
-        if np.count_nonzero(mask) < 200:
-            mask = mask & self.get_scenarios_mask(self.datasets, mask,
-                                                  agg_params["aggregate_scenarios"], agg_params["aggregate_years"],
-                                                  filter_values)
-        return self.datasets[mask].copy()
+        mask = self.index.get_mask(filter_values)
+        return mask & self.get_scenarios_mask(self.datasets, mask,
+                                              agg_params["aggregate_scenarios"], agg_params["aggregate_years"],
+                                              filter_values)
 
     @staticmethod
     def get_scenarios_mask(datasets_reg, mask, agg_scenarios, agg_years, query):
-        blocks_with_mask = [(query, mask)]
-        scenarios_mask = pd.Series(np.full(datasets_reg.shape[0], False), index=datasets_reg.index)
-        for _, partial_mask in expand_model_scenarios(blocks_with_mask, query, agg_scenarios, agg_years, datasets_reg):
-            scenarios_mask = scenarios_mask | partial_mask
-        return scenarios_mask
+        scenario_sets = get_scenario_sets(query, agg_scenarios, agg_years, datasets_reg)
+        return get_full_scenarios_mask(datasets_reg, mask, scenario_sets)
 
     def get_filter_values(self):
         res = {}
@@ -59,6 +57,13 @@ class FilterWidget(ObserverWidget):
             widget.options = partial_dataset[field].unique()
             widget.notify_change({"type": "change", "name": "options", "new": widget.options})
 
+    def update_state_from_mask(self, mask):
+        for field, widget in self.filter_widgets.items():
+            if widget.value:
+                continue
+            widget.options = tuple(self.index.get_options(field, mask))
+            widget.notify_change({"type": "change", "name": "options", "new": widget.options})
+
     def reset_filters(self):
         for widget in self.filter_widgets.values():
             widget.values = tuple()
@@ -1,34 +1,89 @@
+import math
+
 import pandas as pd
-from ipywidgets import Label, VBox, SelectMultiple
+from ipywidgets import Label, VBox, HBox, Button, SelectMultiple, Text
 from cicliminds.widgets.filter import FilterWidget
 
 
 class FilteredWidget:
     MAX_ROWS_TO_SHOW = 20
+    PAGE_SIZE = 100
 
     def __init__(self):
+        self._labels = pd.Series([], dtype=object)
+        self._matched_labels = self._labels
+        self._page = 0
         self.configurations_select = self._get_configurations_select()
+        self.search = self._get_search()
+        self.count_label = Label()
+        self.page_label = Label()
+        self.button_prev = self._get_page_button("Previous", "arrow-left", -1)
+        self.button_next = self._get_page_button("Next", "arrow-right", 1)
         super().__init__()
 
     @staticmethod
     def _get_configurations_select():
         return SelectMultiple(layout={"width": "auto"}, disabled=True)
 
+    def _get_search(self):
+        search = Text(placeholder="Search configurations", continuous_update=False, layout={"width": "auto"})
+        search.observe(self._search_action, names="value")
+        return search
+
+    def _get_page_button(self, description, icon, step):
+        button = Button(description=description, icon=icon, layout={"width": "auto"})
+        button.on_click(lambda change: self._turn_page(step))
+        return button
+
+    @staticmethod
+    def get_labels(dataset):
+        fields = dataset[FilterWidget.FILTER_FIELDS].astype(str)
+        labels = fields[FilterWidget.FILTER_FIELDS[0]]
+        for field in FilterWidget.FILTER_FIELDS[1:]:
+            labels = labels + "," + fields[field]
+        return labels
+
     def update_state_from_dataset(self, dataset):
-        options = []
-        for _, row in dataset.iterrows():
-            options.append((",").join(map(str, row[FilterWidget.FILTER_FIELDS].values)))
-        self.configurations_select.options = options
-        rows = min(self.MAX_ROWS_TO_SHOW, len(options))
-        self.configurations_select.rows = rows
-        self.configurations_select.notify_change({"type": "change", "name": "rows", "new": rows})
-        self.configurations_select.notify_change({"type": "change", "name": "options", "new": options})
+        self._labels = self.get_labels(dataset)
+        self._page = 0
+        self._apply_search()
 
     def get_selected_dataset(self):
-        models = self.configurations_select.value or self.configurations_select.options
+        models = self.configurations_select.value or self._matched_labels
         models_fields = (model.strip().split(",") for model in models)
         model_dicts = (dict(zip(FilterWidget.FILTER_FIELDS, model_fields)) for model_fields in models_fields)
         return pd.DataFrame(model_dicts)
 
     def render(self):
-        return VBox([Label("Filtered configurations:"), self.configurations_select])
+        page_controls = HBox([self.button_prev, self.page_label, self.button_next, self.count_label])
+        return VBox([Label("Filtered configurations:"), self.search, self.configurations_select, page_controls])
+
+    def _search_action(self, change):  # pylint: disable=unused-argument
+        self._page = 0
+        self._apply_search()
+
+    def _apply_search(self):
+        term = self.search.value.strip()
+        if term:
+            self._matched_labels = self._labels[self._labels.str.contains(term, case=False, regex=False)]
+        else:
+            self._matched_labels = self._labels
+        self._show_page()
+
+    def _turn_page(self, step):
+        self._page = min(max(self._page + step, 0), self._get_pages_num() - 1)
+        self._show_page()
+
+    def _get_pages_num(self):
+        return max(1, math.ceil(len(self._matched_labels) / self.PAGE_SIZE))
+
+    def _show_page(self):
+        start = self._page * self.PAGE_SIZE
+        options = list(self._matched_labels.iloc[start:start + self.PAGE_SIZE])
+        self.configurations_select.options = options
+        rows = min(self.MAX_ROWS_TO_SHOW, len(options))
+        self.configurations_select.rows = rows
+        self.configurations_select.notify_change({"type": "change", "name": "rows", "new": rows})
+        self.configurations_select.notify_change({"type": "change", "name": "options", "new": options})
+        self.page_label.value = f"page {self._page + 1}/{self._get_pages_num()}"
+        self.count_label.value = f"{len(self._matched_labels)} of {len(self._labels)} configurations"
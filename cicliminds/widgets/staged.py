@@ -1,37 +1,80 @@
-from ipywidgets import HBox, VBox, Button, Label
+import math
+
+from ipywidgets import HBox, VBox, Button, Label, BoundedIntText, IntProgress
 from cicliminds.widgets.common import ObserverWidget
 from cicliminds.widgets.block import BlockWidget
 
 
 class StagedWidget(ObserverWidget):
-    def __init__(self):
+    PAGE_SIZE = 20
+
+    def __init__(self, workers_num=1):
         self.state = {}
         self.state["button_rebuild_all"] = self._get_rebuild_all_button()
         self.state["button_build_new"] = self._get_build_new_button()
         self.state["button_unstage_all"] = self._get_button_unstage_all()
+        self.state["button_cancel"] = self._get_button_cancel()
+        self.state["progress"] = IntProgress(value=0, min=0, max=0, layout={"width": "auto"})
+        self.state["progress_label"] = Label()
+        self.state["workers_num"] = BoundedIntText(value=workers_num, min=1, max=1024, description="Workers",
+                                                   layout={"width": "auto"})
+        self.state["cache_status"] = Label()
+        self.state["button_prev_page"] = self._get_page_button("Previous", "arrow-left", -1)
+        self.state["button_next_page"] = self._get_page_button("Next", "arrow-right", 1)
+        self.state["page_label"] = Label()
         self.state["staged_list"] = VBox()
         self._block_widgets = []
+        self._page = 0
         super().__init__()
 
     def render(self):
         staged_controls = HBox([self.state["button_rebuild_all"],
                                 self.state["button_build_new"],
-                                self.state["button_unstage_all"]])
+                                self.state["button_unstage_all"],
+                                self.state["button_cancel"],
+                                self.state["workers_num"]])
+        progress = HBox([self.state["progress"], self.state["progress_label"]])
+        page_controls = HBox([self.state["button_prev_page"], self.state["page_label"],
+                              self.state["button_next_page"]])
         staged_widget = VBox([
             Label("Staged for plotting:"),
             staged_controls,
+            progress,
+            self.state["cache_status"],
+            page_controls,
             self.state["staged_list"]])
+        self._show_page()
         return staged_widget
 
     def add_blocks_from_queries(self, queries):
-        rendered_blocks = []
+        new_blocks = []
         for query in queries:
             new_block = BlockWidget(query)
-            new_block.observe(self._unstage_one_action)
+            # propagate first: the app matches unstage events by the block's button, which closing the view drops
             new_block.observe(self.propagate)
-            rendered_blocks.append(new_block.render())
-            self._block_widgets.insert(0, new_block)
-        self.state["staged_list"].children = tuple(rendered_blocks[::-1]) + self.state["staged_list"].children
+            new_block.observe(self._unstage_one_action)
+            new_blocks.append(new_block)
+        # every new block goes on top, so a batch is shown in reverse order
+        self._block_widgets = new_blocks[::-1] + self._block_widgets
+        self._page = 0
+        self._show_page()
+
+    def get_workers_num(self):
+        return self.state["workers_num"].value
+
+    def set_progress(self, done, failed, total):
+        self.state["progress"].max = total
+        self.state["progress"].value = done + failed
+        failed_tag = f", {failed} failed" if failed else ""
+        self.state["progress_label"].value = f"{done + failed}/{total} built{failed_tag}"
+
+    def set_cache_status(self, status):
+        self.state["cache_status"].value = status
+
+    def get_block_widgets(self, only_new=False):
+        if not only_new:
+            return list(self._block_widgets)
+        return [block for block in self._block_widgets if not block.has_payload()]
 
     def get_state(self):
         res = []
@@ -42,12 +85,12 @@ class StagedWidget(ObserverWidget):
 
     def _get_rebuild_all_button(self):
         button_rebuild_all = Button(description="Rebuild all", icon="redo", button_style="success")
-        button_rebuild_all.on_click(self._rebuild_all_action)
+        button_rebuild_all.on_click(self.trigger)
         return button_rebuild_all
 
     def _get_build_new_button(self):
         button_build_new = Button(description="Build new", icon="redo", button_style="info")
-        button_build_new.on_click(self._build_new_action)
+        button_build_new.on_click(self.trigger)
         return button_build_new
 
     def _get_button_unstage_all(self):
@@ -55,28 +98,45 @@ class StagedWidget(ObserverWidget):
         button_unstage_all.on_click(self._unstage_all_action)
         return button_unstage_all
 
+    def _get_button_cancel(self):
+        button_cancel = Button(description="Cancel", icon="stop", button_style="warning")
+        button_cancel.on_click(self.trigger)
+        return button_cancel
+
+    def _get_page_button(self, description, icon, step):
+        button = Button(description=description, icon=icon, layout={"width": "auto"})
+        button.on_click(lambda change: self._turn_page(step))
+        return button
+
+    def _get_pages_num(self):
+        return max(1, math.ceil(len(self._block_widgets) / self.PAGE_SIZE))
+
+    def _turn_page(self, step):
+        self._page = min(max(self._page + step, 0), self._get_pages_num() - 1)
+        self._show_page()
+
+    def _show_page(self):
+        self._page = min(self._page, self._get_pages_num() - 1)
+        start = self._page * self.PAGE_SIZE
+        page_blocks = self._block_widgets[start:start + self.PAGE_SIZE]
+        for block in self._block_widgets:
+            if block.is_rendered() and block not in page_blocks:
+                block.close_view()
+        self.state["staged_list"].children = tuple(block.render() for block in page_blocks)
+        self.state["page_label"].value = f"page {self._page + 1}/{self._get_pages_num()}, " \
+                                         f"{len(self._block_widgets)} blocks"
+
     def _unstage_one_action(self, obj, change):
         block_widget = obj[0]
-        if block_widget.state["unstage_button"] is not change:
+        if block_widget.state.get("unstage_button") is not change:
             return
-        block_idx = None
-        for block_idx, block in enumerate(self._block_widgets):
-            if block.state["unstage_button"] is change:
-                break
-        staged_blocks = self.state["staged_list"].children
-        self.state["staged_list"].children = staged_blocks[:block_idx] + staged_blocks[block_idx+1:]
-        del self._block_widgets[block_idx]
-
-    def _rebuild_all_action(self, change):  # pylint: disable=unused-argument
-        for block in self._block_widgets:
-            block.state["rebuild_button"].click()
+        self._block_widgets = [block for block in self._block_widgets if block is not block_widget]
+        block_widget.close_view()
+        self._show_page()
 
-    def _build_new_action(self, change):  # pylint: disable=unused-argument
+    def _unstage_all_action(self, change):
         for block in self._block_widgets:
-            if block.state["output"].outputs:
-                continue
-            block.state["rebuild_button"].click()
-
-    def _unstage_all_action(self, change):  # pylint: disable=unused-argument
+            block.close_view()
         self._block_widgets = []
-        self.state["staged_list"].children = tuple()
+        self._show_page()
+        self.trigger(change)
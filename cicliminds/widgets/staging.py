@@ -1,19 +1,17 @@
+from functools import partial
+
 from ipywidgets import Label, VBox, HBox, Button, SelectMultiple, Checkbox, IntText
 
-from cicliminds_lib.plotting.config import DEFAULT_RECIPE_CONFIG
-from cicliminds_lib.mask.mask import REFERENCE_REGIONS
 from cicliminds.widgets.common import ObserverWidget
 from cicliminds.interface.plot_types import PLOT_TYPES_SPEC
 
 
 class StagingWidget(ObserverWidget):
-    DEFAULTS = {"plot_type": list(PLOT_TYPES_SPEC)[1],
-                "reference_window_size": DEFAULT_RECIPE_CONFIG["reference_window_size"],
-                "sliding_window_size": DEFAULT_RECIPE_CONFIG["sliding_window_size"],
-                "slide_step": DEFAULT_RECIPE_CONFIG["slide_step"],
-                "normalize_histograms": DEFAULT_RECIPE_CONFIG["normalize_histograms"]}
+    DEFAULT_PLOT_TYPE = "mean val"
+    CONTROLS = ["button_stage", "queries_count"]
 
     def __init__(self, model_weights):
+        from cicliminds_lib.plotting.config import DEFAULT_RECIPE_CONFIG  # pylint: disable=import-outside-toplevel
         self.model_weights = model_weights.copy()
         self.state = {}
         self.state["select_regions"] = self._get_select_regions()
@@ -29,22 +27,24 @@ class StagingWidget(ObserverWidget):
                                                            indent=False, layout={"width": "auto"})
         self.state["aggregate_model_weights"] = Checkbox(description="model weights", value=True,
                                                            indent=False, layout={"width": "auto"})
-        self.state["plot_types"] = SelectMultiple(options=list(PLOT_TYPES_SPEC), value=(self.DEFAULTS["plot_type"],),
+        self.state["plot_types"] = SelectMultiple(options=list(PLOT_TYPES_SPEC), value=(self.DEFAULT_PLOT_TYPE,),
                                                   rows=6, layout={"width": "auto"})
         self.state["subtract_reference"] = Checkbox(description="Subtract reference",
                                                     indent=False, layout={"width": "auto"})
         self.state["normalize_histograms"] = Checkbox(description="Normalize histograms",
-                                                      indent=False, value=self.DEFAULTS["normalize_histograms"],
+                                                      indent=False, value=DEFAULT_RECIPE_CONFIG["normalize_histograms"],
                                                       layout={"width": "auto"})
         self.state["model_weights"] = SelectMultiple(options=list(self.model_weights["name"]), value=[],
                                                      rows=10, layout={"width": "auto"})
-        self.state["reference_window_size"] = IntText(value=self.DEFAULTS["reference_window_size"],
+        self.state["reference_window_size"] = IntText(value=DEFAULT_RECIPE_CONFIG["reference_window_size"],
                                                       layout={"width": "auto"})
-        self.state["sliding_window_size"] = IntText(value=self.DEFAULTS["sliding_window_size"],
+        self.state["sliding_window_size"] = IntText(value=DEFAULT_RECIPE_CONFIG["sliding_window_size"],
                                                     layout={"width": "auto"})
-        self.state["slide_step"] = IntText(value=self.DEFAULTS["slide_step"],
+        self.state["slide_step"] = IntText(value=DEFAULT_RECIPE_CONFIG["slide_step"],
                                            layout={"width": "auto"})
+        self._observe_values()
         self.state["button_stage"] = self._get_button_stage()
+        self.state["queries_count"] = Label()
         super().__init__()
 
     def render(self):
@@ -67,19 +67,27 @@ class StagingWidget(ObserverWidget):
                   Label("Sliding window size"), self.state["sliding_window_size"],
                   Label("Slide step"), self.state["slide_step"]],
                  layout=block_layout),
-            VBox([Label(), self.state["button_stage"]],
+            VBox([Label(), self.state["button_stage"], self.state["queries_count"]],
                  layout=block_layout)
         ])
         return staging_panel
 
     def get_state(self):
-        res = {k: obj.value for k, obj in self.state.items() if k != "button_stage"}
+        res = {k: obj.value for k, obj in self.state.items() if k not in self.CONTROLS}
         selected_region_ids = [region.split(":")[0].strip() for region in res["select_regions"]]
         res["select_regions"] = selected_region_ids
         return res
 
+    def set_queries_count(self, queries_num):
+        self.state["queries_count"].value = f"{queries_num} blocks to stage"
+
+    def _observe_values(self):
+        for widget in self.state.values():
+            widget.observe(partial(self.propagate, [widget]), names="value")
+
     @staticmethod
     def _get_select_regions():
+        from cicliminds_lib.mask.mask import REFERENCE_REGIONS  # pylint: disable=import-outside-toplevel
         region_names = [f'{r.abbrev} :: {r.name}' for r in REFERENCE_REGIONS]
         select = SelectMultiple(options=region_names, value=region_names[:1], rows=10, layout={"width": "auto"})
         return select
@@ -0,0 +1,26 @@
+_WORKER_STATE = {}
+
+
+def get_worker_rc_params():
+    import matplotlib  # pylint: disable=import-outside-toplevel
+    return {k: v for k, v in matplotlib.rcParams.items() if k != "backend"}
+
+
+def init_worker(datasets_reg, model_weights_reg, rc_params, profile="", chunked=None):
+    import matplotlib  # pylint: disable=import-outside-toplevel
+    from cicliminds.builder import BlockBuilder  # pylint: disable=import-outside-toplevel,cyclic-import
+    from cicliminds.cache.inputs_store import InputsStore  # pylint: disable=import-outside-toplevel
+    from cicliminds.cache.fldmean_store import FldmeanStore  # pylint: disable=import-outside-toplevel
+    matplotlib.use("Agg")
+    matplotlib.rcParams.update(rc_params)
+    _WORKER_STATE["builder"] = BlockBuilder(datasets_reg, model_weights_reg, profile=profile, chunked=chunked,
+                                            inputs_store=InputsStore.from_settings(),
+                                            fldmean_store=FldmeanStore.from_settings())
+
+
+def render_queries(indexed_queries):
+    return render_queries_with(_WORKER_STATE["builder"], indexed_queries)
+
+
+def render_queries_with(builder, indexed_queries):
+    return list(builder.render_many(indexed_queries))
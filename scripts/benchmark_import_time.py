@@ -0,0 +1,40 @@
+import sys
+import json
+import subprocess
+import argparse
+
+DEFAULT_MODULES = ["cicliminds.app", "cicliminds.builder", "cicliminds.interface.plot_types"]
+
+
+def measure_import(module, top_num):
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, check=True)
+    imports = list(parse_importtime(completed.stderr))
+    total = next(cumulative for name, _, cumulative in imports if name == module)
+    heaviest = sorted(imports, key=lambda entry: entry[1], reverse=True)[:top_num]
+    return {"cumulative_us": total, "heaviest_self_us": {name: self_us for name, self_us, _ in heaviest}}
+
+
+def parse_importtime(stderr):
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        yield name.strip(), int(self_us), int(cumulative_us)
+
+
+def main(modules, repeat, top_num):
+    res = {}
+    for module in modules:
+        runs = [measure_import(module, top_num) for _ in range(repeat)]
+        res[module] = min(runs, key=lambda run: run["cumulative_us"])
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="measure import time of cicliminds modules in fresh interpreters")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=3, help="report the fastest of several runs")
+    parser.add_argument("--top", type=int, default=10, help="number of heaviest imports to list")
+    parsed = parser.parse_args()
+    json.dump(main(parsed.modules, parsed.repeat, parsed.top), sys.stdout, indent=True)
@@ -0,0 +1,51 @@
+import sys
+import json
+import time
+import argparse
+
+from cicliminds.interface.query_builder.query_builder import expand_state_into_queries
+from cicliminds.interface.plot_types import PLOT_TYPES_SPEC
+from cicliminds.widgets.filter import FilterWidget
+from cicliminds_lib.plotting.config import DEFAULT_RECIPE_CONFIG
+
+from synthetic_data import get_synthetic_registry
+
+
+def get_unaggregated_params(plot_types):
+    return {
+        "select_regions": [],
+        "aggregate_years": False,
+        "aggregate_scenarios": False,
+        "aggregate_regions": False,
+        "aggregate_models": False,
+        "aggregate_model_ensembles": False,
+        "aggregate_model_weights": False,
+        "plot_types": plot_types,
+        "subtract_reference": False,
+        "normalize_histograms": DEFAULT_RECIPE_CONFIG["normalize_histograms"],
+        "model_weights": [],
+        "reference_window_size": DEFAULT_RECIPE_CONFIG["reference_window_size"],
+        "sliding_window_size": DEFAULT_RECIPE_CONFIG["sliding_window_size"],
+        "slide_step": DEFAULT_RECIPE_CONFIG["slide_step"]
+    }
+
+
+def main(models_num, ensembles_num, variables_num, plot_types):
+    datasets = get_synthetic_registry(models_num, ensembles_num, variables_num)
+    filter_values = {field: [] for field in FilterWidget.FILTER_FIELDS}
+    agg_params = get_unaggregated_params(plot_types)
+    started = time.perf_counter()
+    queries_num = sum(1 for _ in expand_state_into_queries(datasets, filter_values, agg_params))
+    elapsed = time.perf_counter() - started
+    return {"registry_rows": datasets.shape[0], "queries": queries_num, "elapsed": elapsed,
+            "queries_per_second": queries_num / elapsed if elapsed else None}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="time expand_state_into_queries on a synthetic catalogue")
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--ensembles", type=int, default=3)
+    parser.add_argument("--variables", type=int, default=2)
+    parser.add_argument("--plot-types", nargs="+", default=list(PLOT_TYPES_SPEC))
+    parsed = parser.parse_args()
+    json.dump(main(parsed.models, parsed.ensembles, parsed.variables, parsed.plot_types), sys.stdout, indent=True)
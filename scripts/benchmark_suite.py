@@ -0,0 +1,202 @@
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import tempfile
+import argparse
+import subprocess
+import tracemalloc
+from importlib import import_module
+
+import numpy as np
+
+from cicliminds_lib.query.files import get_datasets
+from cicliminds_lib.query.files import get_model_weights
+from cicliminds_lib.mask.mask import REFERENCE_REGIONS
+from cicliminds.interface.plot_types import PLOT_TYPES_SPEC
+from cicliminds.interface.query_builder.query_builder import expand_state_into_queries
+from cicliminds.widgets.filter import FilterWidget
+from cicliminds.backend import process_block_query
+from cicliminds.sliding_hists import get_bin_edges
+from cicliminds.sliding_hists import get_fldmean_histograms
+from cicliminds.time_plan import get_window_bounds
+
+from synthetic_data import SCENARIO_TIMESPANS
+from synthetic_data import get_synthetic_registry
+from synthetic_data import check_synthetic_registry
+from synthetic_data import get_synthetic_dataset
+from synthetic_data import write_synthetic_datasets
+from synthetic_data import write_synthetic_model_weights
+from benchmark_query_expansion import get_unaggregated_params
+
+ENVIRONMENT_PACKAGES = ["numpy", "pandas", "xarray", "matplotlib", "cicliminds_lib"]
+
+
+def measure(func, repeat):
+    wall_times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        wall_times.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall_time": min(wall_times), "wall_times": wall_times, "peak_traced_bytes": peak}
+
+
+def get_block_queries(datasets, plot_types):
+    filter_values = {field: [] for field in FilterWidget.FILTER_FIELDS}
+    filter_values["variable"] = [datasets["variable"].iloc[0]]
+    agg_params = dict(get_unaggregated_params(plot_types),
+                      aggregate_years=True, aggregate_models=True, aggregate_model_ensembles=True,
+                      aggregate_regions=True, select_regions=[REFERENCE_REGIONS[0].abbrev])
+    res = {}
+    for query in expand_state_into_queries(datasets, filter_values, agg_params):
+        res.setdefault(query["plot_query"]["plot_type"], query)
+    return res
+
+
+def run_benchmarks(data_dir, weights_dir, repeat):
+    import matplotlib  # pylint: disable=import-outside-toplevel
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+
+    results = {}
+    results["get_datasets"] = measure(lambda: get_datasets(data_dir), repeat)
+    datasets = get_datasets(data_dir)
+    model_weights = get_model_weights(weights_dir)
+
+    plot_types = list(PLOT_TYPES_SPEC)
+    filter_values = {field: [] for field in FilterWidget.FILTER_FIELDS}
+    agg_params = get_unaggregated_params(plot_types)
+    results["expand_state_into_queries"] = measure(
+        lambda: sum(1 for _ in expand_state_into_queries(datasets, filter_values, agg_params)), repeat)
+
+    filter_widget = FilterWidget(datasets)
+    results["get_filtered_dataset"] = measure(lambda: filter_widget.get_filtered_dataset(agg_params), repeat)
+
+    def process_one(query):
+        fig, ax = plt.subplots()
+        process_block_query(fig, ax, query, datasets, model_weights)
+        plt.close(fig)
+
+    for plot_type, query in get_block_queries(datasets, plot_types).items():
+        results[f"process_block_query[{plot_type}]"] = measure(lambda query=query: process_one(query), repeat)
+    return results
+
+
+def run_histogram_benchmarks(registry, lat_num, lon_num, repeat, window_params=(30, 20, 1)):
+    row = registry.iloc[0].to_dict()
+    dataset = get_synthetic_dataset(row, lat_num, lon_num, np.random.default_rng(0))
+    variable = next(iter(dataset.data_vars))
+    values = np.asarray(dataset[variable].values, dtype=float).reshape(dataset[variable].shape[0], -1)
+    weights = np.ones(values.shape[1])
+    windows = get_window_bounds(values.shape[0], *window_params)
+    bin_edges = get_bin_edges(values)
+    results = {}
+    results["histograms[per window]"] = measure(
+        lambda: get_naive_fldmean_histograms(values, weights, bin_edges, windows), repeat)
+    results["histograms[sliding]"] = measure(
+        lambda: get_fldmean_histograms(values, weights, bin_edges, windows), repeat)
+    results["histograms[sliding]"]["max_abs_diff"] = float(np.abs(
+        get_fldmean_histograms(values, weights, bin_edges, windows)
+        - get_naive_fldmean_histograms(values, weights, bin_edges, windows)).max())
+    return results
+
+
+def get_naive_fldmean_histograms(values, weights, bin_edges, windows):
+    res = np.zeros((len(windows), len(bin_edges) - 1))
+    for i, (start, stop) in enumerate(windows):
+        window = values[start:stop]
+        for point in range(values.shape[1]):
+            point_values = window[:, point]
+            point_values = point_values[np.isfinite(point_values)]
+            if point_values.size:
+                res[i] += weights[point] * np.histogram(point_values, bins=bin_edges)[0]
+        has_data = np.isfinite(window).any(axis=0)
+        res[i] /= weights[has_data].sum()
+    return res
+
+
+def get_environment():
+    res = {"python": platform.python_version(), "platform": platform.platform()}
+    for package in ENVIRONMENT_PACKAGES:
+        try:
+            res[package] = getattr(import_module(package), "__version__", "unknown")
+        except ImportError:
+            res[package] = None
+    try:
+        res["git_revision"] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                             check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        res["git_revision"] = None
+    return res
+
+
+def compare_to_baseline(results, baseline):
+    res = {}
+    for name, result in results.items():
+        if name in baseline["results"]:
+            res[name] = result["wall_time"] / baseline["results"][name]["wall_time"]
+    return res
+
+
+def main(params, data_dir, repeat, baseline=None):
+    timespans = {scenario: params["historical"] if scenario == "historical" else params["future"]
+                 for scenario in params["scenarios"]}
+    registry = get_synthetic_registry(params["models"], params["ensembles"], params["variables"],
+                                      params["scenarios"], params["frequencies"], timespans)
+    dataset_dir = os.path.join(data_dir, "datasets")
+    weights_dir = os.path.join(data_dir, "model_weights")
+    if not os.path.isdir(dataset_dir) or not os.listdir(dataset_dir):
+        write_synthetic_datasets(dataset_dir, registry, params["lat"], params["lon"])
+        write_synthetic_model_weights(weights_dir, registry)
+    check_synthetic_registry(get_datasets(dataset_dir), registry)
+    results = run_benchmarks(dataset_dir, weights_dir, repeat)
+    results.update(run_histogram_benchmarks(registry, params["lat"], params["lon"], repeat))
+    res = {"params": params, "environment": get_environment(), "results": results,
+           "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    if baseline is not None:
+        res["relative_to_baseline"] = compare_to_baseline(results, baseline)
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark cicliminds on synthetic ETCCDI-like datasets")
+    parser.add_argument("--models", type=int, default=4)
+    parser.add_argument("--ensembles", type=int, default=2)
+    parser.add_argument("--variables", type=int, default=2)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIO_TIMESPANS))
+    parser.add_argument("--frequencies", nargs="+", default=["yr"])
+    parser.add_argument("--historical", default=SCENARIO_TIMESPANS["historical"], help="years of historical runs")
+    parser.add_argument("--future", default=SCENARIO_TIMESPANS["ssp245"], help="years of scenario runs")
+    parser.add_argument("--lat", type=int, default=36, help="number of latitudes")
+    parser.add_argument("--lon", type=int, default=72, help="number of longitudes")
+    parser.add_argument("--repeat", type=int, default=3, help="report the fastest of several runs")
+    parser.add_argument("--data-dir", default=None, help="keep generated data here and reuse it between runs")
+    parser.add_argument("--baseline", default=None, help="results of a previous run to compare with")
+    parser.add_argument("-o", "--output", default=None, help="output json file (stdout by default)")
+    parsed = parser.parse_args()
+
+    _params = {"models": parsed.models, "ensembles": parsed.ensembles, "variables": parsed.variables,
+               "scenarios": parsed.scenarios, "frequencies": parsed.frequencies,
+               "historical": parsed.historical, "future": parsed.future, "lat": parsed.lat, "lon": parsed.lon}
+    _baseline = None
+    if parsed.baseline is not None:
+        with open(parsed.baseline, "r") as fin:
+            _baseline = json.load(fin)
+    if parsed.data_dir is not None:
+        _res = main(_params, parsed.data_dir, parsed.repeat, _baseline)
+    else:
+        with tempfile.TemporaryDirectory() as _data_dir:
+            _res = main(_params, _data_dir, parsed.repeat, _baseline)
+    if parsed.output is None:
+        json.dump(_res, sys.stdout, indent=True)
+    else:
+        with open(parsed.output, "w") as fout:
+            json.dump(_res, fout, indent=True)
@@ -1,17 +1,109 @@
 import os
+import sys
 import json
-import matplotlib.pyplot as plt
-from cicliminds_lib.query.files import get_datasets
+import time
+from concurrent.futures import as_completed
 from cicliminds_lib.query.files import get_model_weights
-from cicliminds.backend import process_block_query
+from cicliminds.catalogue import get_datasets
+from cicliminds.builder import BlockBuilder
+from cicliminds.builder import group_queries_by_input
+from cicliminds.builder import group_fused_queries
+from cicliminds.cache.hashing import get_query_hash
+from cicliminds.figure_payload import load_figure
 
 
-def main(data_dir, model_weights_dir, query):
+def main(data_dir, model_weights_dir, query, output_file="figure.png", profile_output=None):
     dataset = get_datasets(data_dir)
     model_weights = get_model_weights(model_weights_dir)
-    fig, ax = plt.subplots()
-    process_block_query(fig, ax, query, dataset, model_weights)
-    fig.savefig("figure.png")
+    builder = BlockBuilder.from_settings(dataset, model_weights)
+    if profile_output is None:
+        _, payload, info = next(builder.build_many([query]))
+    else:
+        payload, info = builder.dump_profile(query, profile_output)
+    print(json.dumps(info), file=sys.stderr)
+    if payload is None:
+        raise SystemExit(f"block failed: {info['error']}")
+    load_figure(payload).savefig(output_file)
+    print(builder.get_stats_summary(), file=sys.stderr)
+
+
+def main_batch(data_dir, model_weights_dir, queries, output_dir, fmt="png", workers_num=None, force=False):
+    started = time.perf_counter()
+    dataset = get_datasets(data_dir)
+    model_weights = get_model_weights(model_weights_dir)
+    builder = BlockBuilder.from_settings(dataset, model_weights)
+    if workers_num is not None:
+        builder.workers_num = workers_num
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = []
+    pending = []
+    for idx, query in enumerate(queries):
+        query_hash = get_query_hash(query)
+        filename = f"{query_hash[:16]}.{fmt}"
+        entry = {"index": idx, "query_hash": query_hash, "file": filename, "query": query}
+        manifest.append(entry)
+        if not force and os.path.exists(os.path.join(output_dir, filename)):
+            entry.update({"status": "skipped", "elapsed": 0.})
+            continue
+        pending.append((idx, query))
+
+    futures = {}
+    for group in group_queries_by_input(pending).values():
+        for job in group_fused_queries(group):
+            futures[builder.submit_many([query for _, query in job])] = [idx for idx, _ in job]
+    for future in as_completed(futures):
+        idxs = futures[future]
+        try:
+            results = future.result()
+        except Exception as e:  # pylint: disable=broad-except
+            results = [e]*len(idxs)
+        for idx, result in zip(idxs, results):
+            entry = manifest[idx]
+            save_result(entry, result, output_dir, fmt)
+            print(json.dumps({k: v for k, v in entry.items() if k != "query"}), file=sys.stderr)
+    builder.close()
+
+    summary = {"total_elapsed": time.perf_counter() - started,
+               "cache": builder.result_cache.stats if builder.result_cache is not None else None,
+               "blocks": manifest}
+    with open(os.path.join(output_dir, "manifest.json"), "w") as fout:
+        json.dump(summary, fout, indent=True)
+    print(builder.get_stats_summary(), file=sys.stderr)
+    return summary
+
+
+def save_result(entry, result, output_dir, fmt):
+    try:
+        if isinstance(result, Exception):
+            raise result
+        payload, info = result
+        if payload is None:
+            raise RuntimeError(info["error"])
+        save_payload(payload, os.path.join(output_dir, entry["file"]), fmt)
+    except Exception as e:  # pylint: disable=broad-except
+        entry.update({"status": "failed", "error": repr(e)})
+        return
+    entry.update({"status": "cached" if info["cached"] else "rendered", "elapsed": info["elapsed"]})
+    if "stages" in info:
+        entry["stages"] = info["stages"]
+
+
+def save_payload(payload, filename, fmt):
+    tmp_filename = f"{filename}.tmp"
+    load_figure(payload).savefig(tmp_filename, format=fmt)
+    os.replace(tmp_filename, filename)
+
+
+def read_queries(fin):
+    content = fin.read()
+    try:
+        queries = json.loads(content)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+    if isinstance(queries, dict):
+        return [queries]
+    return queries
 
 
 if __name__ == "__main__":
@@ -22,12 +114,31 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-j", "--json", help="query from json", default=None)
     parser.add_argument("-i", "--input-file", help="query from json file", default=None)
+    parser.add_argument("-o", "--output", help="output file for a single query", default="figure.png")
+    parser.add_argument("-b", "--batch", default=None,
+                        help="dumped list of queries (json) or one query per line (jsonl). '-' reads stdin")
+    parser.add_argument("-d", "--output-dir", help="output directory for batch mode", default="figures")
+    parser.add_argument("-f", "--format", help="output format for batch mode", default="png")
+    parser.add_argument("-w", "--workers", help="number of worker processes", type=int, default=None)
+    parser.add_argument("--force", help="rebuild outputs that already exist", action="store_true")
+    parser.add_argument("--profile-output", default=None,
+                        help="dump cProfile stats of a single query rendering to this file")
     parsed = parser.parse_args()
 
+    if parsed.batch is not None:
+        if parsed.batch == "-":
+            _queries = read_queries(sys.stdin)
+        else:
+            with open(parsed.batch, "r") as fin:
+                _queries = read_queries(fin)
+        _summary = main_batch(_data_dir, _model_weights_dir, _queries, parsed.output_dir,
+                              parsed.format, parsed.workers, parsed.force)
+        sys.exit(1 if any(entry["status"] == "failed" for entry in _summary["blocks"]) else 0)
+
     if parsed.json is not None:
         _query = json.loads(parsed.json)
     elif parsed.input_file is not None:
         with open(parsed.input_file, "r") as fin:
             _query = json.load(fin)
 
-    main(_data_dir, _model_weights_dir, _query)
+    main(_data_dir, _model_weights_dir, _query, parsed.output, parsed.profile_output)
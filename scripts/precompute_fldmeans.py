@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+from cicliminds_lib.query.files import get_model_weights
+from cicliminds_lib.plotting.config import DEFAULT_RECIPE_CONFIG
+from cicliminds.catalogue import get_datasets
+from cicliminds.builder import BlockBuilder
+from cicliminds.cache.inputs_cache import InputsCache
+from cicliminds.interface.plot_types import is_fldmean_plot_query
+from cicliminds.interface.query_builder.query_builder import expand_state_into_queries
+from cicliminds.regional import get_reference_region_names
+from cicliminds.widgets.filter import FilterWidget
+
+from plot_from_query import read_queries
+
+
+def get_registry_queries(datasets, agg_flags):
+    filter_values = {field: [] for field in FilterWidget.FILTER_FIELDS}
+    agg_params = {
+        "select_regions": get_reference_region_names()[:1],
+        "aggregate_regions": True,
+        "aggregate_model_weights": False,
+        "model_weights": [],
+        "plot_types": ["time series"],
+        "subtract_reference": False,
+        "normalize_histograms": DEFAULT_RECIPE_CONFIG["normalize_histograms"],
+        "reference_window_size": DEFAULT_RECIPE_CONFIG["reference_window_size"],
+        "sliding_window_size": DEFAULT_RECIPE_CONFIG["sliding_window_size"],
+        "slide_step": DEFAULT_RECIPE_CONFIG["slide_step"],
+        **agg_flags
+    }
+    yield from expand_state_into_queries(datasets, filter_values, agg_params)
+
+
+def main(data_dir, model_weights_dir, queries=None, agg_flags=None):
+    datasets = get_datasets(data_dir)
+    model_weights = get_model_weights(model_weights_dir)
+    builder = BlockBuilder.from_settings(datasets, model_weights)
+    if builder.fldmean_store is None:
+        raise SystemExit("fldmean store is disabled, set CICLIMINDS_CACHE_DIR and CICLIMINDS_FLDMEAN_STORE_BYTES")
+    if queries is None:
+        queries = get_registry_queries(datasets, agg_flags)
+    seen = set()
+    for query in queries:
+        input_key = InputsCache.get_key(query["input_query"])
+        if not is_fldmean_plot_query(query["plot_query"]) or input_key in seen:
+            continue
+        seen.add(input_key)
+        started = time.perf_counter()
+        computed = builder.precompute_fldmeans(query)
+        print(json.dumps({"input_query": query["input_query"], "status": "computed" if computed else "stored",
+                          "elapsed": time.perf_counter() - started}), file=sys.stderr)
+        builder.inputs_cache.clear()
+    builder.close()
+
+
+if __name__ == "__main__":
+    _data_dir = os.environ["DATA_DIR"]
+    _model_weights_dir = os.environ["MODEL_WEIGHTS_DIR"]
+
+    parser = argparse.ArgumentParser(description="store regional field means of time series blocks for all regions")
+    parser.add_argument("-b", "--batch", default=None,
+                        help="dumped list of queries (json) or one query per line (jsonl). '-' reads stdin. "
+                             "By default all input queries of the registry are used")
+    parser.add_argument("--aggregate-models", action="store_true")
+    parser.add_argument("--aggregate-model-ensembles", action="store_true")
+    parser.add_argument("--aggregate-scenarios", action="store_true")
+    parser.add_argument("--aggregate-years", action="store_true")
+    parsed = parser.parse_args()
+
+    _queries = None
+    if parsed.batch == "-":
+        _queries = read_queries(sys.stdin)
+    elif parsed.batch is not None:
+        with open(parsed.batch, "r") as fin:
+            _queries = read_queries(fin)
+    _agg_flags = {"aggregate_models": parsed.aggregate_models,
+                  "aggregate_model_ensembles": parsed.aggregate_model_ensembles,
+                  "aggregate_scenarios": parsed.aggregate_scenarios,
+                  "aggregate_years": parsed.aggregate_years}
+    main(_data_dir, _model_weights_dir, _queries, _agg_flags)
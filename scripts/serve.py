@@ -0,0 +1,45 @@
+import os
+import sys
+import argparse
+
+from cicliminds_lib.query.files import get_model_weights
+from cicliminds.catalogue import get_datasets
+from cicliminds.builder import BlockBuilder
+from cicliminds.server import RenderService
+from cicliminds.server import make_server
+
+
+def main(data_dir, model_weights_dir, host, port, workers_num=None, max_queue=32, timeout=300.):
+    import matplotlib  # pylint: disable=import-outside-toplevel
+    matplotlib.use("Agg")
+    datasets = get_datasets(data_dir)
+    model_weights = get_model_weights(model_weights_dir)
+    builder = BlockBuilder.from_settings(datasets, model_weights)
+    if workers_num is not None:
+        builder.workers_num = workers_num
+    server = make_server(RenderService(builder, max_queue, timeout), host, port)
+    print(f"serving on http://{host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        builder.close()
+        print(builder.get_stats_summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    _data_dir = os.environ["DATA_DIR"]
+    _model_weights_dir = os.environ["MODEL_WEIGHTS_DIR"]
+
+    parser = argparse.ArgumentParser(description="render blocks over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=8765)
+    parser.add_argument("-w", "--workers", help="number of worker processes", type=int, default=None)
+    parser.add_argument("-q", "--max-queue", help="blocks queued before new requests are rejected", type=int,
+                        default=32)
+    parser.add_argument("-t", "--timeout", help="seconds to wait for a block", type=float, default=300.)
+    parsed = parser.parse_args()
+
+    main(_data_dir, _model_weights_dir, parsed.host, parsed.port, parsed.workers, parsed.max_queue, parsed.timeout)
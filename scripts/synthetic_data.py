@@ -0,0 +1,95 @@
+import os
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+SCENARIO_TIMESPANS = {
+    "historical": "1850-2014",
+    "ssp126": "2015-2100",
+    "ssp245": "2015-2100",
+    "ssp370": "2015-2100",
+    "ssp585": "2015-2100"
+}
+FILENAME_TEMPLATE = "{variable}_{frequency}_{model}_{scenario}_{init_params}_{timespan}.nc"
+TIME_UNITS = "days since 1850-01-01 00:00:00"
+CALENDAR = "365_day"
+STEPS_PER_YEAR = {"yr": 1, "mon": 12}
+
+
+def get_synthetic_registry(models_num=10, ensembles_num=3, variables_num=4,
+                           scenarios=tuple(SCENARIO_TIMESPANS), frequencies=("yr",), timespans=None):
+    timespans = timespans or SCENARIO_TIMESPANS
+    models = [f"MODEL-{i}" for i in range(models_num)]
+    init_params = [f"r{i + 1}i1p1f1" for i in range(ensembles_num)]
+    variables = [f"var{i}ETCCDI" for i in range(variables_num)]
+    rows = []
+    for model, init_param, variable, frequency, scenario in product(models, init_params, variables,
+                                                                      frequencies, scenarios):
+        rows.append({"model": model, "scenario": scenario, "init_params": init_param, "frequency": frequency,
+                     "timespan": timespans[scenario], "variable": variable})
+    return pd.DataFrame(rows)
+
+
+def check_synthetic_registry(datasets, registry, fields=("model", "scenario", "init_params", "frequency", "variable")):
+    fields = list(fields)
+    found = datasets[fields].drop_duplicates().sort_values(fields).reset_index(drop=True)
+    expected = registry[fields].drop_duplicates().sort_values(fields).reset_index(drop=True)
+    if found.shape[0] != expected.shape[0] or not found.equals(expected):
+        raise ValueError(f"the datasets registry has {found.shape[0]} of {expected.shape[0]} synthetic datasets, "
+                         f"check that FILENAME_TEMPLATE matches the file names parsed by cicliminds-lib")
+
+
+def write_synthetic_datasets(data_dir, registry, lat_num=36, lon_num=72, seed=0,
+                             filename_template=FILENAME_TEMPLATE, missing_fraction=0.):
+    os.makedirs(data_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    filenames = []
+    for row in registry.to_dict(orient="records"):
+        filename = os.path.join(data_dir, filename_template.format(**row))
+        get_synthetic_dataset(row, lat_num, lon_num, rng, missing_fraction).to_netcdf(filename)
+        filenames.append(filename)
+    return filenames
+
+
+def get_synthetic_dataset(row, lat_num, lon_num, rng, missing_fraction=0.):
+    import xarray as xr  # pylint: disable=import-outside-toplevel
+    time = get_synthetic_time(row["timespan"], row["frequency"])
+    lat = np.linspace(-90 + 90 / lat_num, 90 - 90 / lat_num, lat_num)
+    lon = np.linspace(0, 360, lon_num, endpoint=False)
+    trend = np.linspace(0, 1, time.size)[:, None, None]
+    values = 10 + 5 * np.cos(np.deg2rad(lat))[None, :, None] + trend + rng.normal(size=(time.size, lat_num, lon_num))
+    if missing_fraction:
+        values[rng.uniform(size=values.shape) < missing_fraction] = np.nan
+    variable = xr.DataArray(values.astype(np.float32), dims=("time", "lat", "lon"),
+                            attrs={"long_name": f"Synthetic {row['variable']}", "units": "1"})
+    return xr.Dataset(
+        {row["variable"]: variable},
+        coords={"time": ("time", time, {"units": TIME_UNITS, "calendar": CALENDAR, "standard_name": "time"}),
+                "lat": ("lat", lat, {"units": "degrees_north", "standard_name": "latitude"}),
+                "lon": ("lon", lon, {"units": "degrees_east", "standard_name": "longitude"})},
+        attrs={"source_id": row["model"], "experiment_id": row["scenario"], "variant_label": row["init_params"],
+               "frequency": row["frequency"]})
+
+
+def get_synthetic_time(timespan, frequency):
+    start_year, end_year = (int(year) for year in timespan.split("-"))
+    steps_per_year = STEPS_PER_YEAR[frequency]
+    steps = np.arange((end_year - start_year + 1) * steps_per_year)
+    days_per_step = 365 / steps_per_year
+    return (start_year - 1850) * 365 + steps * days_per_step + days_per_step / 2
+
+
+def write_synthetic_model_weights(weights_dir, registry, names=("synthetic",), seed=0):
+    os.makedirs(weights_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    models = registry[["model", "init_params", "scenario"]].drop_duplicates()
+    filenames = []
+    for name in names:
+        filename = os.path.join(weights_dir, f"{name}.tsv")
+        with open(filename, "w") as fout:
+            fout.write("# model\tinit_param\tscenario\tweight\n")
+            for model, init_param, scenario in models.itertuples(index=False):
+                fout.write(f"{model}\t{init_param}\t{scenario}\t{rng.uniform(0.1, 1):.4f}\n")
+        filenames.append(filename)
+    return filenames
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# tests must not read or fill the cache of the user
+os.environ["CICLIMINDS_CACHE_DIR"] = tempfile.mkdtemp(prefix="cicliminds-tests-")
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+SYNTHETIC_TIMESPANS = {"historical": "1950-2014", "ssp245": "2015-2060"}
+
+
+@pytest.fixture(scope="session")
+def synthetic_registries(tmp_path_factory):
+    pytest.importorskip("cicliminds_lib")
+    from cicliminds_lib.query.files import get_model_weights  # pylint: disable=import-outside-toplevel
+    from cicliminds.catalogue import get_datasets  # pylint: disable=import-outside-toplevel
+    from synthetic_data import get_synthetic_registry  # pylint: disable=import-outside-toplevel
+    from synthetic_data import check_synthetic_registry  # pylint: disable=import-outside-toplevel
+    from synthetic_data import write_synthetic_datasets  # pylint: disable=import-outside-toplevel
+    from synthetic_data import write_synthetic_model_weights  # pylint: disable=import-outside-toplevel
+    data_dir = tmp_path_factory.mktemp("synthetic")
+    registry = get_synthetic_registry(2, 1, 1, tuple(SYNTHETIC_TIMESPANS), ("yr",), SYNTHETIC_TIMESPANS)
+    write_synthetic_datasets(str(data_dir / "datasets"), registry, missing_fraction=0.05)
+    write_synthetic_model_weights(str(data_dir / "model_weights"), registry)
+    datasets = get_datasets(str(data_dir / "datasets"))
+    check_synthetic_registry(datasets, registry)
+    return datasets, get_model_weights(str(data_dir / "model_weights"))
@@ -0,0 +1,69 @@
+import numpy as np
+
+from cicliminds.builder import BlockBuilder
+from cicliminds.cache.mask_cache import MaskCache
+from cicliminds.figure_payload import load_figure
+from cicliminds.interface.query_builder.query_builder import expand_state_into_queries
+from cicliminds.widgets.filter import FilterWidget
+
+from benchmark_query_expansion import get_unaggregated_params
+from synthetic_data import get_synthetic_registry
+
+
+def make_builder(datasets, model_weights, **kwargs):
+    return BlockBuilder(datasets, model_weights, mask_cache=MaskCache(64), **kwargs)
+
+
+def get_incomplete_registry(seed=0):
+    registry = get_synthetic_registry(6, 3, 2, frequencies=("yr", "mon"))
+    rng = np.random.default_rng(seed)
+    return registry[rng.uniform(size=registry.shape[0]) > 0.2].reset_index(drop=True)
+
+
+def get_block_queries(datasets, plot_type, regions, **agg_overrides):
+    filter_values = {field: [] for field in FilterWidget.FILTER_FIELDS}
+    agg_params = {**get_unaggregated_params([plot_type]),
+                  "aggregate_years": True, "aggregate_models": True, "aggregate_model_ensembles": True,
+                  "aggregate_regions": True, "select_regions": regions, **agg_overrides}
+    return list(expand_state_into_queries(datasets, filter_values, agg_params))
+
+
+def get_plotted_data(fig):
+    res = []
+    for ax in fig.axes:
+        res.extend(np.asarray(line.get_xydata(), dtype=float) for line in ax.get_lines())
+        for patch in ax.patches:
+            if hasattr(patch, "get_data"):
+                res.extend(np.asarray(data, dtype=float) for data in patch.get_data()[:2])
+            elif hasattr(patch, "get_bbox"):
+                res.append(np.asarray(patch.get_bbox().bounds, dtype=float))
+        for artist in [*ax.collections, *ax.get_images()]:
+            array = artist.get_array()
+            if array is not None:
+                res.append(np.ma.filled(np.ma.asarray(array, dtype=float), np.nan))
+    return res
+
+
+def get_plotted_texts(fig, ticks=True):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # pylint: disable=import-outside-toplevel
+    # tick labels are only formatted when the figure is drawn
+    FigureCanvasAgg(fig).draw()
+    res = [text.get_text() for text in fig.texts]
+    for ax in fig.axes:
+        res.extend(ax.get_title(loc) for loc in ["left", "center", "right"])
+        res.extend([ax.get_xlabel(), ax.get_ylabel()])
+        legend = ax.get_legend()
+        if legend is not None:
+            res.extend(text.get_text() for text in legend.texts)
+        if ticks:
+            res.extend(label.get_text() for label in [*ax.get_xticklabels(), *ax.get_yticklabels()])
+    return res
+
+
+def assert_same_plots(payload, expected_payload):
+    fig, expected_fig = load_figure(payload), load_figure(expected_payload)
+    assert get_plotted_texts(fig) == get_plotted_texts(expected_fig)
+    data, expected_data = get_plotted_data(fig), get_plotted_data(expected_fig)
+    assert len(data) == len(expected_data)
+    for values, expected_values in zip(data, expected_data):
+        np.testing.assert_allclose(values, expected_values, rtol=1e-5, equal_nan=True)
@@ -0,0 +1,26 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("cicliminds_lib")
+
+from cicliminds import catalogue
+from cicliminds.catalogue import DatasetsCatalogue
+
+from synthetic_data import get_synthetic_registry
+from synthetic_data import write_synthetic_datasets
+
+
+def test_added_files_are_parsed_as_by_a_full_scan(monkeypatch, tmp_path):
+    data_dir = str(tmp_path / "datasets")
+    registry = get_synthetic_registry(3, 1, 1, ("historical", "ssp245"))
+    write_synthetic_datasets(data_dir, registry.iloc[:4], lat_num=4, lon_num=8)
+    DatasetsCatalogue(data_dir, str(tmp_path / "catalogue.pkl")).refresh()
+    write_synthetic_datasets(data_dir, registry.iloc[4:], lat_num=4, lon_num=8, seed=1)
+    expected = DatasetsCatalogue(data_dir, str(tmp_path / "full-catalogue.pkl")).refresh()
+    monkeypatch.setattr(catalogue, "scan_datasets", lambda data_dir: pytest.fail("the directory was scanned again"))
+    incremental = DatasetsCatalogue(data_dir, str(tmp_path / "catalogue.pkl"))
+    datasets = incremental.refresh()
+    assert incremental.stats["added"] == registry.shape[0] - 4
+    columns = list(expected.columns)
+    assert datasets.sort_values(columns).reset_index(drop=True).equals(
+        expected.sort_values(columns).reset_index(drop=True))
@@ -0,0 +1,33 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("cicliminds_lib")
+
+from cicliminds.regional import get_reference_region_names
+from cicliminds.chunked import ChunkedExecution
+
+from tests.helpers import make_builder
+from tests.helpers import get_block_queries
+from tests.helpers import assert_same_plots
+
+
+@pytest.mark.parametrize("plot_type", ["mean val", "time series", "fldmean last"])
+@pytest.mark.parametrize("scheduler", ["threads", "synchronous"])
+def test_chunked_plots_match_in_memory_plots(synthetic_registries, plot_type, scheduler):
+    pytest.importorskip("dask")
+    datasets, model_weights = synthetic_registries
+    query, = get_block_queries(datasets, plot_type, get_reference_region_names()[:2])
+    expected_payload, _ = make_builder(datasets, model_weights).render(query)
+    chunked = ChunkedExecution({"time": 10}, scheduler)
+    builder = make_builder(datasets, model_weights, chunked=chunked)
+    try:
+        payload, _ = builder.render(query)
+    finally:
+        builder.close()
+    assert_same_plots(payload, expected_payload)
+
+
+def test_memory_limit_requires_distributed_scheduler():
+    with pytest.raises(ValueError, match="distributed"):
+        ChunkedExecution({"time": 10}, "threads", memory_limit="4GB")
+    assert ChunkedExecution({"time": 10}, "distributed", memory_limit="4GB").memory_limit == "4GB"
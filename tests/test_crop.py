@@ -0,0 +1,82 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+xr = pytest.importorskip("xarray")
+
+import numpy as np
+
+from cicliminds.crop import crop_to_mask
+from cicliminds.figure_payload import load_figure
+
+
+def get_grid_data(lon, region_lon):
+    lat = np.arange(-5., 10., 5.)
+    dataset = xr.Dataset({"tx": (("lat", "lon"), np.arange(len(lat) * len(lon), dtype=float).reshape(len(lat), -1))},
+                         coords={"lat": lat, "lon": lon})
+    mask = xr.DataArray(np.isin(lon, region_lon)[None, :] & (lat == 0.)[:, None], dims=("lat", "lon"),
+                        coords={"lat": lat, "lon": lon})
+    return dataset, mask
+
+
+def test_crop_across_seam_keeps_source_longitudes():
+    lon = np.arange(0., 360., 10.)
+    dataset, mask = get_grid_data(lon, [340., 350., 0., 10.])
+    cropped_dataset, cropped_mask = crop_to_mask(dataset, mask)
+    np.testing.assert_array_equal(cropped_dataset["lon"].values, [-20., -10., 0., 10.])
+    np.testing.assert_array_equal(cropped_mask["lon"].values, [-20., -10., 0., 10.])
+    np.testing.assert_array_equal(cropped_dataset["tx"].values, dataset["tx"].isel(lat=[1], lon=[34, 35, 0, 1]).values)
+    np.testing.assert_array_equal(dataset["lon"].values, lon)
+    np.testing.assert_array_equal(mask["lon"].values, lon)
+
+
+def test_crop_across_dateline_stays_increasing():
+    lon = np.arange(-180., 180., 10.)
+    dataset, mask = get_grid_data(lon, [160., 170., -180., -170.])
+    cropped_dataset, _ = crop_to_mask(dataset, mask)
+    np.testing.assert_array_equal(cropped_dataset["lon"].values, [160., 170., 180., 190.])
+    np.testing.assert_array_equal(dataset["lon"].values, lon)
+
+
+@pytest.fixture(params=[0, "MED"])
+def region(request):
+    pytest.importorskip("cicliminds_lib")
+    from cicliminds.regional import get_reference_region_names  # pylint: disable=import-outside-toplevel
+    region_names = get_reference_region_names()
+    if isinstance(request.param, int):
+        return region_names[request.param]
+    # the synthetic grid spans 0..360 degrees east, so MED is cropped across the edge of the longitude axis
+    if request.param not in region_names:
+        pytest.skip(f"{request.param} is not a reference region")
+    return request.param
+
+
+def render_cropped_and_full(monkeypatch, synthetic_registries, plot_type, region):
+    from tests.helpers import make_builder  # pylint: disable=import-outside-toplevel
+    from tests.helpers import get_block_queries  # pylint: disable=import-outside-toplevel
+    datasets, model_weights = synthetic_registries
+    query = get_block_queries(datasets, plot_type, [region])[0]
+    payload, _ = make_builder(datasets, model_weights).render(query)
+    monkeypatch.setattr("cicliminds.backend.crop_to_mask", lambda dataset, mask: (dataset, mask))
+    expected_payload, _ = make_builder(datasets, model_weights).render(query)
+    return payload, expected_payload
+
+
+@pytest.mark.parametrize("plot_type", ["time series", "fldmean last"])
+def test_cropped_fldmean_plots_match_full_grid(monkeypatch, synthetic_registries, plot_type, region):
+    from tests.helpers import assert_same_plots  # pylint: disable=import-outside-toplevel
+    assert_same_plots(*render_cropped_and_full(monkeypatch, synthetic_registries, plot_type, region))
+
+
+def test_cropped_mean_val_keeps_region_values(monkeypatch, synthetic_registries, region):
+    from tests.helpers import get_plotted_data  # pylint: disable=import-outside-toplevel
+    from tests.helpers import get_plotted_texts  # pylint: disable=import-outside-toplevel
+    payload, expected_payload = render_cropped_and_full(monkeypatch, synthetic_registries, "mean val", region)
+    fig, expected_fig = load_figure(payload), load_figure(expected_payload)
+    # the cropped map only shows the extent of the region, so its ticks differ, the values inside of it are the same
+    assert get_plotted_texts(fig, ticks=False) == get_plotted_texts(expected_fig, ticks=False)
+    data, expected_data = get_plotted_data(fig), get_plotted_data(expected_fig)
+    assert len(data) == len(expected_data)
+    for values, expected_values in zip(data, expected_data):
+        values, expected_values = np.ravel(values), np.ravel(expected_values)
+        np.testing.assert_allclose(np.sort(values[np.isfinite(values)]),
+                                   np.sort(expected_values[np.isfinite(expected_values)]), rtol=1e-5)
@@ -0,0 +1,37 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("cicliminds_lib")
+
+from cicliminds.regional import get_reference_region_names
+from cicliminds.cache.fldmean_store import FldmeanStore
+
+from tests.helpers import make_builder
+from tests.helpers import get_block_queries
+from tests.helpers import assert_same_plots
+
+
+def test_fused_time_series_match_single_blocks(synthetic_registries):
+    datasets, model_weights = synthetic_registries
+    queries = get_block_queries(datasets, "time series", get_reference_region_names()[:3], aggregate_regions=False)
+    assert len(queries) == 3
+    builder = make_builder(datasets, model_weights)
+    fused = {idx: payload for idx, payload, info in builder.render_many(list(enumerate(queries)))
+             if info.get("fused")}
+    assert set(fused) == {0, 1, 2}
+    for idx, query in enumerate(queries):
+        payload, _ = builder.render(query)
+        assert_same_plots(fused[idx], payload)
+
+
+def test_stored_fldmeans_match_single_blocks(synthetic_registries, tmp_path):
+    datasets, model_weights = synthetic_registries
+    query, = get_block_queries(datasets, "time series", get_reference_region_names()[:1])
+    builder = make_builder(datasets, model_weights, fldmean_store=FldmeanStore(str(tmp_path), 1024**3))
+    payload, info = builder.render(query)
+    assert not info.get("fused")
+    assert builder.precompute_fldmeans(query)
+    stored_payload, info = builder.render(query)
+    assert info.get("fused")
+    assert builder.fldmean_store.stats["hits"] == 1
+    assert_same_plots(stored_payload, payload)
@@ -0,0 +1,26 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("cicliminds_lib")
+
+from cicliminds.interface.query_builder.query_builder import count_state_queries
+from cicliminds.interface.query_builder.query_builder import expand_state_into_queries
+from cicliminds.widgets.filter import FilterWidget
+
+from benchmark_query_expansion import get_unaggregated_params
+from tests.helpers import get_incomplete_registry
+
+
+@pytest.mark.parametrize("aggregate_years", [False, True])
+@pytest.mark.parametrize("aggregate_scenarios", [False, True])
+@pytest.mark.parametrize("aggregate_models", [False, True])
+@pytest.mark.parametrize("scenarios", [[], ["historical", "ssp245"], ["ssp126", "ssp585"]])
+def test_count_matches_expanded_queries(aggregate_years, aggregate_scenarios, aggregate_models, scenarios):
+    datasets = get_incomplete_registry()
+    filter_values = {field: [] for field in FilterWidget.FILTER_FIELDS}
+    filter_values["scenario"] = scenarios
+    agg_params = {**get_unaggregated_params(["time series", "mean val"]),
+                  "aggregate_years": aggregate_years, "aggregate_scenarios": aggregate_scenarios,
+                  "aggregate_models": aggregate_models, "aggregate_model_ensembles": aggregate_models}
+    queries = list(expand_state_into_queries(datasets, filter_values, agg_params))
+    assert count_state_queries(datasets, filter_values, agg_params) == len(queries)
@@ -0,0 +1,36 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("cicliminds_lib")
+
+import numpy as np
+import pandas as pd
+
+from cicliminds.interface.query_builder.filter_expander import expand_model_scenarios
+from cicliminds.interface.query_builder.filter_expander import get_scenario_sets
+from cicliminds.interface.query_builder.filter_expander import get_full_scenarios_mask
+from cicliminds.widgets.filter import FilterWidget
+
+from tests.helpers import get_incomplete_registry
+
+
+def get_blockwise_scenarios_mask(datasets, mask, agg_scenarios, agg_years, filter_values):
+    res = pd.Series(np.full(datasets.shape[0], False), index=datasets.index)
+    for _, partial_mask in expand_model_scenarios([(filter_values, mask)], filter_values,
+                                                  agg_scenarios, agg_years, datasets):
+        res = res | partial_mask
+    return res
+
+
+@pytest.mark.parametrize("agg_scenarios, agg_years", [(False, False), (True, False), (False, True), (True, True)])
+@pytest.mark.parametrize("scenarios", [[], ["historical", "ssp245"], ["ssp126", "ssp585"]])
+def test_full_scenarios_mask_matches_blockwise_filter(agg_scenarios, agg_years, scenarios):
+    datasets = get_incomplete_registry()
+    filter_values = {field: [] for field in FilterWidget.FILTER_FIELDS}
+    filter_values["scenario"] = scenarios
+    mask = datasets["model"] != "MODEL-0"
+    if scenarios:
+        mask &= datasets["scenario"].isin(scenarios)
+    expected = get_blockwise_scenarios_mask(datasets, mask, agg_scenarios, agg_years, filter_values)
+    scenario_sets = get_scenario_sets(filter_values, agg_scenarios, agg_years, datasets)
+    np.testing.assert_array_equal(get_full_scenarios_mask(datasets, mask, scenario_sets).values, expected.values)
@@ -0,0 +1,52 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("cicliminds_lib")
+
+import numpy as np
+
+from cicliminds.interface.plot_types import FLDMEAN_LAST_RECIPES
+from cicliminds.interface.plot_types import import_object
+from cicliminds.regional import get_reference_region_names
+from cicliminds.sliding_hists import get_bin_edges
+from cicliminds.sliding_hists import get_fldmean_histograms
+from cicliminds.time_plan import get_window_bounds
+
+from benchmark_suite import get_naive_fldmean_histograms
+from tests.helpers import make_builder
+from tests.helpers import get_block_queries
+from tests.helpers import assert_same_plots
+
+
+def render_with_engine(monkeypatch, builder, query, engine):
+    recipes = [import_object(path) for path in FLDMEAN_LAST_RECIPES[engine]]
+    monkeypatch.setattr("cicliminds.backend.get_plot_recipe_by_query",
+                        lambda plot_query: recipes[int(plot_query["subtract_reference"])])
+    payload, _ = builder.render(query)
+    return payload
+
+
+@pytest.mark.parametrize("subtract_reference", [False, True])
+@pytest.mark.parametrize("normalize_histograms", [False, True])
+def test_sliding_engine_matches_library_recipe(monkeypatch, synthetic_registries, subtract_reference,
+                                               normalize_histograms):
+    datasets, model_weights = synthetic_registries
+    query = get_block_queries(datasets, "fldmean last", get_reference_region_names()[:1],
+                              subtract_reference=subtract_reference, normalize_histograms=normalize_histograms)[0]
+    builder = make_builder(datasets, model_weights)
+    payload = render_with_engine(monkeypatch, builder, query, "sliding")
+    expected_payload = render_with_engine(monkeypatch, builder, query, "lib")
+    assert_same_plots(payload, expected_payload)
+
+
+@pytest.mark.parametrize("window_params", [(30, 20, 1), (10, 5, 7), (20, 20, 20)])
+def test_sliding_counts_match_per_window_histograms(window_params):
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(100, 40))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    values[:, 3] = np.nan
+    weights = rng.random(values.shape[1])
+    windows = get_window_bounds(values.shape[0], *window_params)
+    bin_edges = get_bin_edges(values)
+    np.testing.assert_allclose(get_fldmean_histograms(values, weights, bin_edges, windows),
+                               get_naive_fldmean_histograms(values, weights, bin_edges, windows))
@@ -0,0 +1,22 @@
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("cicliminds_lib")
+
+from cicliminds.regional import get_reference_region_names
+from cicliminds.time_plan import TIME_PLANNERS
+
+from tests.helpers import make_builder
+from tests.helpers import get_block_queries
+from tests.helpers import assert_same_plots
+
+
+@pytest.mark.parametrize("subtract_reference", [False, True])
+def test_planned_mean_val_matches_full_time_axis(monkeypatch, synthetic_registries, subtract_reference):
+    datasets, model_weights = synthetic_registries
+    query = get_block_queries(datasets, "mean val", get_reference_region_names()[:1],
+                              subtract_reference=subtract_reference)[0]
+    payload, _ = make_builder(datasets, model_weights).render(query)
+    monkeypatch.delitem(TIME_PLANNERS, "mean val")
+    expected_payload, _ = make_builder(datasets, model_weights).render(query)
+    assert_same_plots(payload, expected_payload)